@@ -1,73 +1,34 @@
-from orc_agent import get_agent
+from orc_agent import get_agent, invoke_assembler_agent, tools
+from concurrency import run_concurrently
+from functools import partial
+import pymongo.errors
+import openai
+import httpx
+import redis
+import os
 # from stratergist.agent import get_stratergy_agent
 
+# "parallel" fans the asset-class tools out concurrently and assembles the
+# report in one LLM call; "agent" lets the OpenAI-functions agent drive them.
+ORC_MODE = os.getenv("ORC_MODE", "parallel")
+ORC_MAX_WORKERS = int(os.getenv("ORC_MAX_WORKERS", "4"))
 
-query_template = """
-You are an expert Financial Investment Advisor.
-
-For mutual_funds_tool(user_inputs):
-user_inputs = {{
-    "objective": "{objective}",
-    "horizon": "{investment_horizon} years",
-    "age": {age},
-    "monthly_investment": {mutual_fund},
-    "lumpsum_investment": {mutual_fund_lumpsum},
-    "risk": "{risk}",
-    "fund_type": "-",
-    "special_prefs": "-"
-}}
-
-For etfs_tool(user_inputs):
-user_inputs = {{
-    "objective": "{objective}",
-    "horizon": "{investment_horizon} years",
-    "age": {age},
-    "monthly_investment": {etf},
-    "lumpsum_investment": {etf_lumpsum},
-    "risk": "{risk}",
-    "fund_type": "-",
-    "special_prefs": "-"
-}}
-
-For bonds_tool(user_inputs):
-user_inputs = {{  
-    "objective": "{objective}",
-    "horizon": "{investment_horizon} years",
-    "age": {age},
-    "monthly_investment": {bond},
-    "lumpsum_investment": {bond_lumpsum},
-    "risk": "{risk}",
-    "fund_type": "-",
-    "special_prefs": "-"
-}}
+# transient LLM / network / Mongo failures worth another attempt: _run_tool
+# re-raises these so the report job is retried instead of assembling a report
+# around an "Error: ..." tool output
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TransportError,
+    pymongo.errors.AutoReconnect,
+    pymongo.errors.ConnectionFailure,
+    redis.ConnectionError,
+)
 
-For sgb_tool(user_inputs):
-user_inputs = {{
-    "objective": "{objective}",
-    "horizon": "{investment_horizon} years",
-    "age": {age},
-    "monthly_investment": {sgb},
-    "lumpsum_investment": {sgb_lumpsum},
-    "risk": "{risk}",
-    "fund_type": "-",
-    "special_prefs": "-"
-}}
-
-Instructions:
-1. Pass the user_inputs object as argument to the tools correctly without any error in values
-2. Use the tools to get the best mutual funds, ETFs, and bonds based on the user's inputs
-3. If both {mutual_fund} and {mutual_fund_lumpsum} are 0, skip mutual funds tool
-4. If both {etf} and {etf_lumpsum} are 0, skip ETFs tool
-5. If both {bond} and {bond_lumpsum} are 0, skip bonds tool
-6. If both {sgb} and {sgb_lumpsum} are 0, skip SGBs tool
-7. Do not summarize or filter any information from the tools output - include EACH and EVERY detailed information provided by the tools
-
-IMPORTANT: 
-- Do NOT skip any details provided by the tools
-- Include every single fund, ETF, and bond suggested
-- Preserve all metrics, ratios, and performance data
-- Maintain the exact formatting structure shown below
 
+report_schema_template = """
 Produce your recommendation strictly as valid JSON, matching this schema exactly:
 {{
   "Investment Portfolio Recommendation": {{
@@ -141,7 +102,194 @@ Produce your recommendation strictly as valid JSON, matching this schema exactly
 }}
 """
 
-def run_orc_agent(user_inputs):
+query_template = """
+You are an expert Financial Investment Advisor.
+
+For mutual_funds_tool(user_inputs):
+user_inputs = {{
+    "objective": "{objective}",
+    "horizon": "{investment_horizon} years",
+    "age": {age},
+    "monthly_investment": {mutual_fund},
+    "lumpsum_investment": {mutual_fund_lumpsum},
+    "risk": "{risk}",
+    "fund_type": "-",
+    "special_prefs": "-"
+}}
+
+For etfs_tool(user_inputs):
+user_inputs = {{
+    "objective": "{objective}",
+    "horizon": "{investment_horizon} years",
+    "age": {age},
+    "monthly_investment": {etf},
+    "lumpsum_investment": {etf_lumpsum},
+    "risk": "{risk}",
+    "fund_type": "-",
+    "special_prefs": "-"
+}}
+
+For bonds_tool(user_inputs):
+user_inputs = {{  
+    "objective": "{objective}",
+    "horizon": "{investment_horizon} years",
+    "age": {age},
+    "monthly_investment": {bond},
+    "lumpsum_investment": {bond_lumpsum},
+    "risk": "{risk}",
+    "fund_type": "-",
+    "special_prefs": "-"
+}}
+
+For sgb_tool(user_inputs):
+user_inputs = {{
+    "objective": "{objective}",
+    "horizon": "{investment_horizon} years",
+    "age": {age},
+    "monthly_investment": {sgb},
+    "lumpsum_investment": {sgb_lumpsum},
+    "risk": "{risk}",
+    "fund_type": "-",
+    "special_prefs": "-"
+}}
+
+Instructions:
+1. Pass the user_inputs object as argument to the tools correctly without any error in values
+2. Use the tools to get the best mutual funds, ETFs, and bonds based on the user's inputs
+3. If both {mutual_fund} and {mutual_fund_lumpsum} are 0, skip mutual funds tool
+4. If both {etf} and {etf_lumpsum} are 0, skip ETFs tool
+5. If both {bond} and {bond_lumpsum} are 0, skip bonds tool
+6. If both {sgb} and {sgb_lumpsum} are 0, skip SGBs tool
+7. Do not summarize or filter any information from the tools output - include EACH and EVERY detailed information provided by the tools
+
+IMPORTANT: 
+- Do NOT skip any details provided by the tools
+- Include every single fund, ETF, and bond suggested
+- Preserve all metrics, ratios, and performance data
+- Maintain the exact formatting structure shown below
+""" + report_schema_template
+
+assembly_template = """
+You are an expert Financial Investment Advisor.
+
+The asset-class research tools have already been run for the user's portfolio.
+Objective: {objective}, Horizon: {investment_horizon} years, Age: {age}, Risk: {risk}
+
+Monthly allocation (₹): Mutual Funds {mutual_fund}, ETFs {etf}, Bonds {bond}, SGBs {sgb}
+Lumpsum allocation (₹): Mutual Funds {mutual_fund_lumpsum}, ETFs {etf_lumpsum}, Bonds {bond_lumpsum}, SGBs {sgb_lumpsum}
+
+Tool outputs:
+{tool_outputs}
+
+Instructions:
+1. Build the report only from the tool outputs above
+2. Asset classes without a tool output were skipped because both their amounts are 0 - leave their details empty
+3. Do not summarize or filter any information from the tools output - include EACH and EVERY detailed information provided by the tools
+
+IMPORTANT: 
+- Do NOT skip any details provided by the tools
+- Include every single fund, ETF, and bond suggested
+- Preserve all metrics, ratios, and performance data
+- Maintain the exact formatting structure shown below
+""" + report_schema_template
+
+# tool name -> (monthly key, lumpsum key) in the orchestrator inputs
+ASSET_CLASS_KEYS = {
+    "mutual_funds_tool": ("mutual_fund", "mutual_fund_lumpsum"),
+    "etfs_tool": ("etf", "etf_lumpsum"),
+    "bonds_tool": ("bond", "bond_lumpsum"),
+    "sgb_tool": ("sgb", "sgb_lumpsum"),
+}
+
+def build_tool_inputs(user_inputs):
+    """Per-tool user_inputs for every asset class with a non-zero monthly or lumpsum amount."""
+    tool_inputs = {}
+    for tool_name, (monthly_key, lumpsum_key) in ASSET_CLASS_KEYS.items():
+        monthly = user_inputs.get(monthly_key, 0) or 0
+        lumpsum = user_inputs.get(lumpsum_key, 0) or 0
+        if monthly == 0 and lumpsum == 0:
+            continue
+        tool_inputs[tool_name] = {
+            "objective": user_inputs.get("objective", ""),
+            "horizon": f"{user_inputs.get('investment_horizon', '')} years",
+            "age": user_inputs.get("age", 0),
+            "monthly_investment": monthly,
+            "lumpsum_investment": lumpsum,
+            "risk": user_inputs.get("risk", ""),
+            "fund_type": "-",
+            "special_prefs": "-"
+        }
+    return tool_inputs
+
+def _notify(on_event, event, **data):
+    """Report progress to the caller's on_event(event, **data) hook; never fails the run."""
+    if on_event is None:
+        return
+    try:
+        on_event(event, **data)
+    except Exception as e:
+        print(f"⚠️ Progress hook failed for {event}: {e}")
+
+def _run_tool(tool_name, tool_func, tool_input, on_event=None):
+    print(f"🚀 Running {tool_name}...")
+    _notify(on_event, "tool_started", tool=tool_name)
+    try:
+        output = tool_func(tool_input)
+        print(f"✅ {tool_name} finished")
+        _notify(on_event, "tool_finished", tool=tool_name, ok=True, output=output)
+        return output
+    except Exception as e:
+        print(f"❌ {tool_name} failed: {e}")
+        _notify(on_event, "tool_finished", tool=tool_name, ok=False, error=str(e))
+        if isinstance(e, TRANSIENT_ERRORS):
+            raise
+        return f"Error: {tool_name} failed - {e}"
+
+def run_asset_tools(user_inputs, on_event=None, finished=None):
+    """
+    Run the asset-class tools concurrently, returning {tool_name: output}.
+    Tools with an output in `finished` (from an earlier attempt) are not run again.
+    """
+    tool_funcs = {t.name: t.func for t in tools}
+    tool_inputs = build_tool_inputs(user_inputs)
+    if not tool_inputs:
+        return {}
+
+    finished = finished or {}
+    pending = [name for name in tool_inputs if name not in finished]
+    outputs = run_concurrently(
+        *[partial(_run_tool, name, tool_funcs[name], tool_inputs[name], on_event) for name in pending],
+        max_workers=ORC_MAX_WORKERS
+    )
+    outputs = {**finished, **dict(zip(pending, outputs))}
+    return {name: outputs[name] for name in tool_inputs}
+
+def run_orc_parallel(user_inputs, on_event=None, finished=None):
+    outputs = run_asset_tools(user_inputs, on_event, finished)
+    tool_outputs = "\n\n".join(
+        f"### {name} output:\n{output}" for name, output in outputs.items()
+    ) or "No asset class has a non-zero allocation."
+
+    values = {key: user_inputs.get(key, 0) for pair in ASSET_CLASS_KEYS.values() for key in pair}
+    query = assembly_template.format(
+        objective=user_inputs.get("objective", ""),
+        investment_horizon=user_inputs.get("investment_horizon", ""),
+        age=user_inputs.get("age", 0),
+        risk=user_inputs.get("risk", ""),
+        tool_outputs=tool_outputs,
+        **values
+    )
+    return invoke_assembler_agent(query)
+
+def run_orc_agent(user_inputs, mode=None, on_event=None, finished=None):
+    """
+    on_event(event, **data) is called as each asset-class tool starts and
+    finishes ("tool_started" / "tool_finished", the latter with the output);
+    only the parallel mode reports per-tool progress and skips the tools in
+    `finished`, the agent mode decides tool calls inside the LLM loop.
+    """
+    if (mode or ORC_MODE) == "parallel":
+        return run_orc_parallel(user_inputs, on_event, finished)
     agent = get_agent()
     query = query_template.format(**user_inputs)
     response = agent.invoke({"input": query})
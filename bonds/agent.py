@@ -1,9 +1,6 @@
 from .toolkit import fetch_ytm, fetch_coupon, fetch_diff_ltp_face, fetch_maturity, fetch_ltp
-from langchain.agents import initialize_agent, Tool, AgentType
-from dotenv import load_dotenv
-import os
-load_dotenv()
-from langchain_community.chat_models import ChatOpenAI
+from langchain.agents import Tool
+from llm_pool import get_agent_executor
 
 tools = [
     Tool(
@@ -74,11 +71,4 @@ tools = [
 ]
 
 def initialize_bonds_agent():
-    print("🔧 Initializing Bonds Agent...")
-    return initialize_agent(
-        tools=tools,
-        llm=ChatOpenAI(model="gpt-4o-mini", temperature=0.2, openai_api_key=os.getenv("OPENAI_API_KEY")),
-        agent=AgentType.OPENAI_FUNCTIONS,
-        handle_parsing_errors=True,
-        verbose=True
-    )
\ No newline at end of file
+    return get_agent_executor("Bonds", tools, "gpt-4o-mini", temperature=0.2)
\ No newline at end of file
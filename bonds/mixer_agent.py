@@ -1,17 +1,13 @@
-from dotenv import load_dotenv
 import os
-from langchain_community.chat_models import ChatOpenAI
-
-load_dotenv()
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from llm_pool import get_llm
+from prompt_cache import cached_predict
 
 def initialize_mixer_agent():
-    return ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.2,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
+    return get_llm("gpt-4o", temperature=0.2)
 
 def invoke_mixer_agent(input_query):
     mixer_agent = initialize_mixer_agent()
-    response = mixer_agent.predict(input_query)
+    response = cached_predict("bonds.mixer_agent", mixer_agent, input_query)
     return response
\ No newline at end of file
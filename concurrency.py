@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Max independent branches (e.g. monthly / lumpsum) a tool runs at once
+BRANCH_MAX_WORKERS = int(os.getenv("BRANCH_MAX_WORKERS", "2"))
+
+def run_concurrently(*calls, max_workers=None):
+    """
+    Run zero-argument callables on a thread pool and return their results
+    in the order given. The first call to fail raises straight away: calls
+    not started yet are cancelled and running ones are not waited for (they
+    finish in the background).
+    """
+    if not calls:
+        return []
+    workers = min(max_workers or BRANCH_MAX_WORKERS, len(calls))
+    if workers <= 1:
+        return [call() for call in calls]
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(call) for call in calls]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            if future in done and future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -14,4 +14,5 @@ index_collection = db["index_data"]
 etf_collection = db["etf_data"]
 insurance_collection = db["insurance_data"]
 report_collection = db["report_data"]
-stratergy_collection = db["stratergies"]
\ No newline at end of file
+stratergy_collection = db["stratergies"]
+nav_history_collection = db["nav_history"]
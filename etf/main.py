@@ -2,10 +2,18 @@ from .agent import get_etfs_agent
 from .pre_agent import invoke_pre_agent
 from .toolkit import fetch_long_term_returns
 from .mixer_agent import invoke_mixer_agent
-import re
 import json
 import ast
 from langchain.tools import tool
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from concurrency import run_concurrently
+from query_builder import build_etf_filter, extract_query_block
+
+# "rules" builds the Mongo queries deterministically from query_builder;
+# "llm" has the pre-agent write them
+PRE_QUERY_MODE = os.getenv("PRE_QUERY_MODE", "rules")
 
 pre_query_template = """
 You are an expert ETF Research Analyst. Your task is to define the filter parameters for selecting ETFs from the MongoDB database based on the user's financial profile.
@@ -176,7 +184,7 @@ For each fund, provide:
     - Match to goal/horizon/risk.
     - Key metrics (e.g., "5Y CAGR: 12% | Sharpe: 1.2 | Expense: 0.5%").
 - Peer Comparison:
-    - How it ranks vs. category (top 10%/median/bottom).
+    - How it ranks vs. category, from the tools' peer_ranks (top 10%/median/bottom).
     - Consistency across market cycles.
 - Caveats:
     - Recent underperformance, sector bets, liquidity risks, etc.
@@ -274,7 +282,7 @@ For each fund, provide:
     - Match to goal/horizon/risk.
     - Key metrics (e.g., "5Y CAGR: 12% | Sharpe: 1.2 | Expense: 0.5%").
 - Peer Comparison:
-    - How it ranks vs. category (top 10%/median/bottom).
+    - How it ranks vs. category, from the tools' peer_ranks (top 10%/median/bottom).
     - Consistency across market cycles.
 - Caveats:
     - Recent underperformance, sector bets, liquidity risks, etc.
@@ -312,6 +320,48 @@ For Monthly SIP Investment:
  - Caveat: Recent sector rotation; monitor closely.
 """
 
+def build_mongo_queries_with_pre_agent(user_inputs):
+    """Ask the pre-agent LLM to write the monthly and lumpsum Mongo queries."""
+    pre_query = pre_query_template.format(**user_inputs)
+    pre_query_lumpsum = pre_query_lumpsum_template.format(**user_inputs)
+    pre_agent_response, pre_lumpsum_agent_response = run_concurrently(
+        lambda: invoke_pre_agent(pre_query),
+        lambda: invoke_pre_agent(pre_query_lumpsum),
+    )
+
+    mongo_query = extract_query_block(pre_agent_response)
+    mongo_query_lumpsum = extract_query_block(pre_lumpsum_agent_response)
+    if mongo_query:
+        print("✅ Extracted Query:", mongo_query)
+    else:
+        print("❌ Query block not found in the response.")
+        mongo_query = "{}"  # Default to an empty query if not found
+    if mongo_query_lumpsum:
+        print("✅ Extracted Lumpsum Query:", mongo_query_lumpsum)
+    else:
+        print("❌ Lumpsum Query block not found in the response.")
+        mongo_query_lumpsum = "{}"
+
+    return mongo_query, mongo_query_lumpsum
+
+def build_mongo_queries(user_inputs):
+    """
+    Return the (monthly, lumpsum) Mongo queries as JSON strings. Uses the
+    query_builder rule tables unless PRE_QUERY_MODE is "llm", and falls back
+    to the pre-agent when the inputs don't fit the rules.
+    """
+    if PRE_QUERY_MODE == "rules":
+        try:
+            monthly_filter = build_etf_filter(user_inputs["horizon"], user_inputs["monthly_investment"])
+            lumpsum_filter = build_etf_filter(user_inputs["horizon"], user_inputs["lumpsum_investment"])
+            mongo_query, mongo_query_lumpsum = json.dumps(monthly_filter), json.dumps(lumpsum_filter)
+            print("✅ Built Query:", mongo_query)
+            print("✅ Built Lumpsum Query:", mongo_query_lumpsum)
+            return mongo_query, mongo_query_lumpsum
+        except (KeyError, ValueError) as e:
+            print(f"⚠️ Rule-based query failed ({e}), falling back to pre-agent")
+    return build_mongo_queries_with_pre_agent(user_inputs)
+
 def etfs_tool(user_inputs) -> str:
     """
     Uses the ETFs agent to fetch personalized ETF recommendations
@@ -328,38 +378,24 @@ def etfs_tool(user_inputs) -> str:
                 return "Error: Could not parse user inputs"
     
     print("🔍 User Inputs:", user_inputs)
-    pre_query = pre_query_template.format(**user_inputs)
-    pre_query_lumpsum = pre_query_lumpsum_template.format(**user_inputs)
-    pre_agent_response = invoke_pre_agent(pre_query)
-    pre_lumpsum_agent_response = invoke_pre_agent(pre_query_lumpsum)
-
-    query_match = re.search(r"query = (\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})", pre_agent_response, re.DOTALL)
-    query_lumpsum_match = re.search(r"query = (\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})", pre_lumpsum_agent_response, re.DOTALL)
-    if query_match:
-        mongo_query = query_match.group(1)  # Extract the matched query block
-        print("✅ Extracted Query:", mongo_query)
-    else:
-        print("❌ Query block not found in the response.")
-        mongo_query = "{}"  # Default to an empty query if not found
-    if query_lumpsum_match:
-        mongo_query_lumpsum = query_lumpsum_match.group(1)
-        print("✅ Extracted Lumpsum Query:", mongo_query_lumpsum)
-    else:
-        print("❌ Lumpsum Query block not found in the response.")
-        mongo_query_lumpsum = "{}"
+    mongo_query, mongo_query_lumpsum = build_mongo_queries(user_inputs)
 
     user_inputs["mongo_query"] = mongo_query
     user_inputs["mongo_query_lumpsum"] = mongo_query_lumpsum
 
     agent = get_etfs_agent()
     query_monthly = query_monthly_template.format(**user_inputs)
-    response_monthly = agent.invoke({"input": query_monthly})
-    if(user_inputs["lumpsum_investment"] == 0):
-        query_lumpsum = "No Lumpsum Investment Found"
-        response_lumpsum = {"output": "No Lumpsum Investment Found"}
-    else:
+
+    def run_lumpsum():
+        if(user_inputs["lumpsum_investment"] == 0):
+            return {"output": "No Lumpsum Investment Found"}
         query_lumpsum = query_lumpsum_template.format(**user_inputs)
-        response_lumpsum = agent.invoke({"input": query_lumpsum})
+        return agent.invoke({"input": query_lumpsum})
+
+    response_monthly, response_lumpsum = run_concurrently(
+        lambda: agent.invoke({"input": query_monthly}),
+        run_lumpsum,
+    )
     
     mixer_query = mixer_query_template.format(
         lumpsum_response=response_lumpsum.get("output", "No response from Lumpsum agent."),
@@ -1,18 +1,14 @@
-from dotenv import load_dotenv
 import os
-from langchain_community.chat_models import ChatOpenAI
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from llm_pool import get_llm
+from prompt_cache import cached_predict
 
-load_dotenv()
-
-# Initialize the ChatOpenAI model directly
+# Shared ChatOpenAI client from the process-wide pool
 def initialize_pre_agent():
-    return ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.2,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
+    return get_llm("gpt-4o", temperature=0.2)
 
 def invoke_pre_agent(input_query):
     pre_agent = initialize_pre_agent()
-    response = pre_agent.predict(input_query)
+    response = cached_predict("etf.pre_agent", pre_agent, input_query)
     return response
\ No newline at end of file
@@ -1,7 +1,6 @@
-from main import extract_investment_data
+from main import extract_investment_data, save_strategies
 from agent_entry import run_orc_agent
 from stratergist.main import run_strategist_agent
-from db import stratergy_collection
 
 user_inputs = {
     "lumpsum": 15000,
@@ -21,8 +20,7 @@ formatted_data = {
 
 # Insert the formatted strategy data into the database
 try:
-    stratergy_collection.delete_many({"type": base_type_id})  # Clear existing strategies with the same type_id
-    result = stratergy_collection.insert_one(formatted_data)
+    result = save_strategies(formatted_data, replace=True)  # Replace existing strategies with the same type_id
     print(f"✅ Strategy added successfully with ID: {result.inserted_id}")
 except Exception as e:
     print(f"❌ Error adding strategy: {e}")
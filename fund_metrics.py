@@ -0,0 +1,137 @@
+from cachetools import TTLCache
+from threading import Lock
+from dotenv import load_dotenv
+from orc_cache import data_version
+import numpy as np
+import json
+import os
+
+load_dotenv()
+
+# One projected find() per (collection, filter), ranked in a single NumPy
+# pass and sliced into the four views the fund toolkits expose. Results are
+# cached briefly so the agent's four tool calls (and the concurrent monthly /
+# lumpsum branches) share one round trip, and only the top-K funds reach the
+# prompt however loose the filter is. Keys include orc_cache.data_version(),
+# so an ingest or batch job that bumps the catalog version retires every
+# cached ranking at once, in step with the orchestrator cache.
+
+FUND_METRICS_TTL_SECONDS = int(os.getenv("FUND_METRICS_TTL_SECONDS", "300"))
+FUND_METRICS_CACHE_SIZE = int(os.getenv("FUND_METRICS_CACHE_SIZE", "256"))
+# 0 disables the cut-off and returns every matching fund (still ranked)
+FUND_TOP_K = int(os.getenv("FUND_TOP_K", "15"))
+
+# z-scored metric -> weight in the composite score (negative = lower is better)
+SCORE_WEIGHTS = {
+    "1_year_return": 0.5,
+    "3_year_return": 1.0,
+    "5_year_return": 1.0,
+    "sharpe_ratio": 1.0,
+    "sortino_ratio": 0.5,
+    "alpha": 0.5,
+    "standard_deviation": -0.5,
+    "expense_ratio": -1.0,
+}
+
+VIEWS = {
+    "short_term": ["1_week_return", "1_month_return", "3_month_return", "6_month_return", "1_year_return"],
+    "long_term": ["3_year_return", "5_year_return", "10_year_return"],
+    "risk": ["sharpe_ratio", "sortino_ratio", "beta", "alpha", "standard_deviation", "information_ratio", "r_squared"],
+    "fees": ["category", "expense_ratio", "minimum_investment", "exit_load", "fund_manager"],
+}
+
+PROJECTION = {"_id": 0, "fund_name": 1, "peer_ranks": 1, **{field: 1 for fields in VIEWS.values() for field in fields}}
+
+_cache = TTLCache(maxsize=FUND_METRICS_CACHE_SIZE, ttl=FUND_METRICS_TTL_SECONDS)
+_lock = Lock()
+
+def parse_filter(query_filter) -> dict:
+    """Accept a filter as a dict or JSON string ("{}" / empty meaning no filter)."""
+    if isinstance(query_filter, dict):
+        return query_filter
+    if not query_filter or query_filter.strip() == "{}":
+        return {}
+    return json.loads(query_filter)
+
+def normalize_filter(filter_dict: dict) -> str:
+    return json.dumps(filter_dict, sort_keys=True, default=str)
+
+def _metric_matrix(docs: list, fields: list) -> np.ndarray:
+    """Documents -> float matrix, with NaN for missing or non-numeric values ("" from the extractors)."""
+    def num(value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return np.nan
+    return np.array([[num(doc.get(field)) for field in fields] for doc in docs], dtype=float).reshape(len(docs), len(fields))
+
+def score_funds(docs: list, weights: dict = None) -> np.ndarray:
+    """Weighted sum of per-metric z-scores; missing metrics count as the average."""
+    weights = weights or SCORE_WEIGHTS
+    fields = list(weights)
+    values = _metric_matrix(docs, fields)
+    present = ~np.isnan(values)
+    counts = np.maximum(present.sum(axis=0), 1)
+    filled = np.where(present, values, 0.0)
+    mean = filled.sum(axis=0) / counts
+    std = np.sqrt((np.where(present, values - mean, 0.0) ** 2).sum(axis=0) / counts)
+    z = np.where(present & (std > 0), (values - mean) / np.where(std > 0, std, 1.0), 0.0)
+    return z @ np.array([weights[field] for field in fields])
+
+def category_percentiles(categories: list, scores: np.ndarray) -> np.ndarray:
+    """Percentile (0-100] of each fund's score among the matched funds of its category."""
+    if len(scores) == 0:
+        return np.array([])
+    _, group, counts = np.unique(np.array(categories, dtype=str), return_inverse=True, return_counts=True)
+    order = np.lexsort((scores, group))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ranks = np.empty(len(scores), dtype=int)
+    ranks[order] = np.arange(len(scores)) - starts[group[order]]
+    return 100.0 * (ranks + 1) / counts[group]
+
+def rank_funds(docs: list, top_k: int = None) -> list:
+    """Top-K documents by composite score, each annotated with score and category_percentile."""
+    top_k = FUND_TOP_K if top_k is None else top_k
+    if not docs:
+        return []
+    scores = score_funds(docs)
+    percentiles = category_percentiles([doc.get("category") or "" for doc in docs], scores)
+    order = np.argsort(-scores, kind="stable")
+    if top_k > 0:
+        order = order[:top_k]
+    return [
+        {**docs[i], "score": round(float(scores[i]), 3), "category_percentile": round(float(percentiles[i]), 1)}
+        for i in order
+    ]
+
+def fetch_fund_metrics(collection, query_filter, top_k: int = None) -> list:
+    """Return the top-K matching funds with all toolkit fields, from cache when possible."""
+    filter_dict = parse_filter(query_filter)
+    key = (collection.full_name, normalize_filter(filter_dict), top_k, data_version())
+    with _lock:
+        docs = _cache.get(key)
+    if docs is None:
+        docs = rank_funds(list(collection.find(filter_dict, PROJECTION)), top_k)
+        with _lock:
+            _cache[key] = docs
+    return docs
+
+def fund_view(collection, query_filter, view: str) -> list:
+    """
+    Slice the ranked fund documents down to one toolkit view, with the
+    precomputed category peer_ranks (peer_ranks.py) of the view's metrics.
+    """
+    fields = VIEWS[view]
+    return [
+        {
+            "fund_name": doc["fund_name"],
+            **{field: doc.get(field) for field in fields},
+            "score": doc["score"],
+            "category_percentile": doc["category_percentile"],
+            "peer_ranks": {field: rank for field, rank in (doc.get("peer_ranks") or {}).items() if field in fields},
+        }
+        for doc in fetch_fund_metrics(collection, query_filter)
+    ]
+
+def clear_fund_metrics_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,94 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
+from db import db
+
+# Indexes every query path in the app relies on, per collection.
+# ensure_indexes() is idempotent (create_indexes is a no-op for an index that
+# already exists with the same name and spec), so it is safe to run on every
+# worker start.
+
+FUND_METRIC_INDEXES = [
+    IndexModel([("fund_name", ASCENDING)], name="fund_name"),
+    IndexModel([("category", ASCENDING), ("expense_ratio", ASCENDING)], name="category_expense_ratio"),
+    IndexModel([("category", ASCENDING), ("1_year_return", DESCENDING)], name="category_1_year_return"),
+    IndexModel([("category", ASCENDING), ("3_year_return", DESCENDING)], name="category_3_year_return"),
+    IndexModel([("category", ASCENDING), ("5_year_return", DESCENDING)], name="category_5_year_return"),
+    IndexModel([("category", ASCENDING), ("sharpe_ratio", DESCENDING)], name="category_sharpe_ratio"),
+]
+
+INDEXES = {
+    "mutual_funds": FUND_METRIC_INDEXES + [
+        # keyset pagination of /api/mutual_funds?sort=fund_name
+        IndexModel([("fund_name", ASCENDING), ("_id", ASCENDING)], name="fund_name_id"),
+    ],
+    "etf_data": FUND_METRIC_INDEXES + [
+        # ETF filters are return thresholds without a category
+        IndexModel([("1_year_return", DESCENDING), ("3_year_return", DESCENDING)], name="1_year_3_year_return"),
+    ],
+    "report_data": [
+        IndexModel([("type", ASCENDING)], name="type"),
+    ],
+    "stratergies": [
+        IndexModel([("type", ASCENDING)], name="type"),
+    ],
+    "bonds": [
+        IndexModel([("SYMBOL", ASCENDING)], name="SYMBOL"),
+        IndexModel([("MATURITY_DATE", ASCENDING)], name="MATURITY_DATE"),
+    ],
+    "gold_bonds": [
+        IndexModel([("safe_premium", ASCENDING), ("return_score", DESCENDING)], name="safe_premium_return_score"),
+    ],
+    "mutual_funds_bkp": [
+        IndexModel([("schemeCode", ASCENDING)], name="schemeCode"),
+    ],
+    "index_data": [
+        IndexModel([("symbol", ASCENDING)], name="symbol"),
+    ],
+    "nav_history": [
+        IndexModel([("series", ASCENDING), ("year", ASCENDING)], name="series_year", unique=True),
+    ],
+}
+
+def ensure_indexes(database=db) -> dict:
+    """Create any declared index that is missing. Returns {collection: [index names]}."""
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = database[collection_name].create_indexes(models)
+        except ServerSelectionTimeoutError as e:
+            print(f"❌ MongoDB unreachable, skipping index setup: {e}")
+            break
+        except PyMongoError as e:
+            print(f"❌ Could not ensure indexes on {collection_name}: {e}")
+    print(f"✅ Indexes ensured on {len(created)} collections")
+    return created
+
+def report_indexes(database=db) -> dict:
+    """
+    Compare declared indexes with what exists. For each collection returns
+    the declared indexes that are missing and the existing ones ($indexStats)
+    with no recorded use since the server started.
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = database[collection_name]
+        declared = {model.document["name"] for model in models}
+        try:
+            existing = set(collection.index_information())
+            usage = {
+                stat["name"]: stat["accesses"]["ops"]
+                for stat in collection.aggregate([{"$indexStats": {}}])
+            }
+        except PyMongoError as e:
+            print(f"❌ Could not read indexes on {collection_name}: {e}")
+            continue
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+        }
+        print(f"📊 {collection_name}: missing={report[collection_name]['missing']} unused={report[collection_name]['unused']}")
+    return report
+
+if __name__ == "__main__":
+    ensure_indexes()
+    report_indexes()
@@ -0,0 +1,237 @@
+from redis_pool import redis_client
+from threading import Event, Thread
+import orjson
+import random
+import time
+import uuid
+import os
+
+# Durable Redis job queue for work that must not run inside the web workers.
+#
+#   jobs:ready       list  job ids waiting for a worker (LPUSH / RPOP, FIFO)
+#   jobs:processing  zset  job id -> visibility deadline of the claiming worker
+#   jobs:delayed     zset  job id -> time a retry becomes ready again
+#   jobs:dead        list  job ids that exhausted their attempts
+#   job:{job_id}     hash  kind, payload (orjson), attempts, last_error
+#                          (state "done" and no payload once acknowledged)
+#
+# A claim moves the id from ready to processing in one Lua call, and the
+# worker keeps pushing the deadline forward while the handler runs. If a
+# worker dies mid-job, its deadline lapses and requeue_due() hands the job to
+# another worker, so jobs survive restarts and deploys. Every claim counts as
+# an attempt, so a job that keeps killing its worker is buried after
+# JOB_MAX_ATTEMPTS claims instead of looping forever.
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "300"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "86400"))
+
+READY = "jobs:ready"
+PROCESSING = "jobs:processing"
+DELAYED = "jobs:delayed"
+DEAD = "jobs:dead"
+
+# only touches the keys it is given; the job hash is not known until the pop,
+# so run_job counts the attempt on it afterwards
+_CLAIM = redis_client.register_script("""
+local job_id = redis.call('RPOP', KEYS[1])
+if not job_id then return nil end
+redis.call('ZADD', KEYS[2], ARGV[1], job_id)
+return job_id
+""")
+
+_REQUEUE_DUE = redis_client.register_script("""
+local moved = 0
+for _, source in ipairs({KEYS[2], KEYS[3]}) do
+    local due = redis.call('ZRANGEBYSCORE', source, '-inf', ARGV[1], 'LIMIT', 0, 100)
+    for _, job_id in ipairs(due) do
+        if redis.call('ZREM', source, job_id) == 1 then
+            redis.call('LPUSH', KEYS[1], job_id)
+            moved = moved + 1
+        end
+    end
+end
+return moved
+""")
+
+class RetryableError(Exception):
+    """Raise from a handler (or register an exception type) to have the job retried with backoff."""
+
+_handlers = {}
+_lost_handlers = {}
+
+def register(kind: str, handler, on_failure=None, retry_on: tuple = (), on_lost=None):
+    """
+    handler(payload) runs the job. on_failure(payload, error) runs once when
+    the job is given up on. Exceptions in retry_on (and RetryableError) are
+    retried up to JOB_MAX_ATTEMPTS; anything else fails the job immediately.
+    on_lost(job_id, error) runs when a claimed id's record has expired, so
+    neither its kind nor its payload is known; every registered on_lost is
+    called and should ignore ids it does not own.
+    """
+    _handlers[kind] = (handler, on_failure, (RetryableError,) + tuple(retry_on))
+    if on_lost:
+        _lost_handlers[kind] = on_lost
+
+def _key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def enqueue(kind: str, payload: dict, job_id: str = None) -> str:
+    job_id = job_id or str(uuid.uuid4())
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(_key(job_id), mapping={"kind": kind, "payload": orjson.dumps(payload), "attempts": 0, "enqueued_at": time.time()})
+    pipe.expire(_key(job_id), JOB_TTL_SECONDS)
+    pipe.lpush(READY, job_id)
+    pipe.execute()
+    return job_id
+
+def claim() -> str | None:
+    job_id = _CLAIM(keys=[READY, PROCESSING], args=[time.time() + JOB_VISIBILITY_TIMEOUT])
+    return job_id.decode() if job_id else None
+
+def extend(job_id: str):
+    """Push the visibility deadline forward; only while this worker still holds the job."""
+    redis_client.zadd(PROCESSING, {job_id: time.time() + JOB_VISIBILITY_TIMEOUT}, xx=True)
+
+def ack(job_id: str):
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zrem(PROCESSING, job_id)
+    # keep a tombstone so a duplicate claim (after a lapsed deadline) can tell done from lost
+    pipe.hdel(_key(job_id), "payload")
+    pipe.hset(_key(job_id), "state", "done")
+    pipe.expire(_key(job_id), JOB_TTL_SECONDS)
+    pipe.execute()
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_SECONDS * 2 ** (attempts - 1)))
+
+def retry(job_id: str, attempts: int, error: str):
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(_key(job_id), "last_error", error)
+    pipe.zrem(PROCESSING, job_id)
+    pipe.zadd(DELAYED, {job_id: time.time() + backoff_seconds(attempts)})
+    pipe.execute()
+
+def bury(job_id: str, error: str):
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(_key(job_id), "last_error", error)
+    pipe.zrem(PROCESSING, job_id)
+    pipe.lpush(DEAD, job_id)
+    pipe.execute()
+
+def _give_up(job_id: str, payload, error: Exception, on_failure):
+    bury(job_id, str(error))
+    if on_failure:
+        try:
+            on_failure(payload, error)
+        except Exception as e:
+            print(f"⚠️ Failure hook for job {job_id} failed: {e}")
+
+def _lost(job_id: str):
+    error = RuntimeError("Job record expired before it could run")
+    bury(job_id, str(error))
+    redis_client.expire(_key(job_id), JOB_TTL_SECONDS)
+    for kind, on_lost in _lost_handlers.items():
+        try:
+            on_lost(job_id, error)
+        except Exception as e:
+            print(f"⚠️ Lost-job hook for {kind} failed on {job_id}: {e}")
+
+def requeue_due() -> int:
+    """Return expired claims and due retries to the ready list."""
+    return int(_REQUEUE_DUE(keys=[READY, PROCESSING, DELAYED], args=[time.time()]))
+
+def stats() -> dict:
+    return {
+        "ready": redis_client.llen(READY),
+        "processing": redis_client.zcard(PROCESSING),
+        "delayed": redis_client.zcard(DELAYED),
+        "dead": redis_client.llen(DEAD),
+    }
+
+def run_job(job_id: str):
+    """Run one claimed job to ack, retry or bury; keeps its claim alive while the handler runs."""
+    kind, payload, state = redis_client.hmget(_key(job_id), "kind", "payload", "state")
+    if state == b"done":
+        # already acknowledged by a worker that outlived its deadline
+        redis_client.zrem(PROCESSING, job_id)
+        return
+    if kind is None:
+        print(f"❌ Job {job_id} expired before it could run")
+        _lost(job_id)
+        return
+    attempts = redis_client.hincrby(_key(job_id), "attempts", 1)
+    payload = orjson.loads(payload)
+    if kind.decode() not in _handlers:
+        print(f"❌ No handler registered for job {job_id} ({kind.decode()})")
+        bury(job_id, f"No handler for {kind.decode()}")
+        return
+    handler, on_failure, retry_on = _handlers[kind.decode()]
+    if attempts > JOB_MAX_ATTEMPTS:
+        # every claim counts, so a job that keeps crashing or OOM-killing its
+        # worker (and is requeued by its lapsed deadline) is buried here
+        error = RuntimeError(f"Job claimed {attempts} times without finishing (worker lost each time)")
+        print(f"❌ Job {job_id} ({kind.decode()}): {error}")
+        _give_up(job_id, payload, error, on_failure)
+        return
+
+    done = Event()
+    def heartbeat():
+        while not done.wait(JOB_VISIBILITY_TIMEOUT / 3):
+            # a Redis blip must not end the heartbeat and lose the claim mid-run
+            try:
+                extend(job_id)
+            except Exception as e:
+                print(f"⚠️ Could not extend claim on job {job_id}: {e}")
+    Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        handler(payload)
+    except retry_on as e:
+        if attempts < JOB_MAX_ATTEMPTS:
+            print(f"🔁 Job {job_id} attempt {attempts} failed, retrying: {e}")
+            retry(job_id, attempts, str(e))
+        else:
+            print(f"❌ Job {job_id} failed after {attempts} attempts: {e}")
+            _give_up(job_id, payload, e, on_failure)
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}")
+        _give_up(job_id, payload, e, on_failure)
+    else:
+        # the job finished: an ack error must not retry or bury it; if the ack
+        # is lost, the lapsed claim is requeued and met by the done tombstone
+        # or, failing that, re-run
+        try:
+            ack(job_id)
+            print(f"✅ Job {job_id} ({kind.decode()}) done")
+        except Exception as e:
+            print(f"⚠️ Job {job_id} ({kind.decode()}) done but not acknowledged: {e}")
+    finally:
+        done.set()
+
+def work(concurrency: int = 1, poll_interval: float = 1.0, stop: Event = None):
+    """Run `concurrency` worker threads claiming and running jobs until `stop` is set."""
+    stop = stop or Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                requeue_due()
+                job_id = claim()
+            except Exception as e:
+                print(f"⚠️ Job queue unavailable: {e}")
+                stop.wait(poll_interval)
+                continue
+            if job_id is None:
+                stop.wait(poll_interval)
+                continue
+            run_job(job_id)
+
+    threads = [Thread(target=loop, name=f"job-worker-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,75 @@
+from langchain.agents import initialize_agent, AgentType
+from langchain_community.chat_models import ChatOpenAI
+from threading import Lock
+from dotenv import load_dotenv
+import httpx
+import os
+
+load_dotenv()
+
+# Process-wide registry of warmed LLM clients and agent executors.
+# Shared objects hold only configuration (model, temperature, tools); all
+# request state travels through the invoke()/predict() arguments.
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "600"))
+
+_lock = Lock()
+_http_client = None
+_llms = {}
+_agents = {}
+
+def get_http_client() -> httpx.Client:
+    """Shared keep-alive HTTP client so every LLM hop reuses pooled TLS connections."""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                        keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+                    ),
+                    timeout=LLM_TIMEOUT_SECONDS,
+                )
+    return _http_client
+
+def get_llm(model: str, temperature: float = 0.2) -> ChatOpenAI:
+    """Return the shared ChatOpenAI client for (model, temperature)."""
+    key = (model, float(temperature))
+    llm = _llms.get(key)
+    if llm is None:
+        http_client = get_http_client()
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    openai_api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=http_client,
+                )
+                _llms[key] = llm
+    return llm
+
+def get_agent_executor(name: str, tools: list, model: str, temperature: float = 0.2):
+    """Return the shared OpenAI-functions agent executor registered under `name`."""
+    key = (name, model, float(temperature))
+    agent = _agents.get(key)
+    if agent is None:
+        llm = get_llm(model, temperature)
+        with _lock:
+            agent = _agents.get(key)
+            if agent is None:
+                print(f"🔧 Initializing {name} agent ({model})...")
+                agent = initialize_agent(
+                    tools=tools,
+                    llm=llm,
+                    agent=AgentType.OPENAI_FUNCTIONS,
+                    handle_parsing_errors=True,
+                    verbose=True
+                )
+                _agents[key] = agent
+    return agent
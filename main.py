@@ -1,18 +1,26 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
-from flask_executor import Executor
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import uuid
 from threading import Lock
+from cachetools import TTLCache
 import os
-from agent_entry import run_orc_agent
 from db import mutual_funds_collection, report_collection, stratergy_collection
-from why.main import mutual_fund_reasoner_tool
+from indexes import ensure_indexes
+from redis_pool import redis_client
+import task_store
+import task_events
+from report_jobs import enqueue_orc_report
+from why.main import get_fund_reason
 import redis
 import json
-import pickle
 import re
 from urllib.parse import unquote
+from bson import ObjectId
+import base64
+import numpy as np
+import projection
+import monte_carlo
 
 app = Flask(__name__)
 CORS(app, supports_credentials=True, resources={
@@ -27,26 +35,88 @@ CORS(app, supports_credentials=True, resources={
     }
 })
 
-# Initialize Flask-Executor
-executor = Executor(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=task_events.SOCKETIO_MESSAGE_QUEUE)
+task_events.init_socketio(socketio)
 
-# Initialize response store
-response_store = {}
-store_lock = Lock()
+# Create any missing Mongo indexes when the worker boots (idempotent)
+if os.environ.get("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true":
+    ensure_indexes()
 
-# Use environment variable for Redis URL in production, fallback to localhost for dev
-REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
-redis_client = redis.Redis.from_url(REDIS_URL)
+MF_PAGE_MAX = 1000
+MF_STREAM_BATCH = 500
+
+def _encode_cursor(value, _id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, str(_id)]).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    value, _id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return value, ObjectId(_id)
 
 @app.route('/api/mutual_funds', methods=['GET'])
 def get_all_mutual_funds():
-    mutual_funds = mutual_funds_collection.find()
-    mutual_funds_list = []
-    for fund in mutual_funds:
-        fund["_id"] = str(fund["_id"])
-        mutual_funds_list.append(fund)
-    return jsonify({"mutual_funds": mutual_funds_list}), 200
+    """
+    Stream mutual funds with keyset pagination.
+    Query params:
+      - sort: "_id" (default) or "fund_name"
+      - limit: page size, 1..MF_PAGE_MAX (larger values are capped); omitted streams the whole collection
+      - cursor: "next_cursor" from the previous page
+      - fields: comma-separated projection, e.g. "fund_name,category"
+      - format: "json" (default, {"mutual_funds": [...], "next_cursor": ...}) or "ndjson"
+    """
+    sort_field = request.args.get("sort", "_id")
+    if sort_field not in ("_id", "fund_name"):
+        return jsonify({"error": "sort must be '_id' or 'fund_name'"}), 400
+    try:
+        limit = request.args.get("limit")
+        limit = int(limit) if limit is not None else None
+        cursor = request.args.get("cursor")
+        after = _decode_cursor(cursor) if cursor else None
+    except Exception:
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+    if limit is not None:
+        if limit < 1:
+            return jsonify({"error": "limit must be at least 1"}), 400
+        limit = min(limit, MF_PAGE_MAX)
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    projection = {f: 1 for f in fields + [sort_field]} if fields else None
+    ndjson = request.args.get("format") == "ndjson"
+
+    query = {}
+    if after:
+        value, after_id = after
+        if sort_field == "_id":
+            query = {"_id": {"$gt": after_id}}
+        else:
+            query = {"$or": [{"fund_name": {"$gt": value}}, {"fund_name": value, "_id": {"$gt": after_id}}]}
+    sort = [("_id", 1)] if sort_field == "_id" else [("fund_name", 1), ("_id", 1)]
+
+    funds = mutual_funds_collection.find(query, projection).sort(sort).batch_size(MF_STREAM_BATCH)
+    if limit:
+        funds = funds.limit(limit)
+
+    def generate():
+        count, last = 0, None
+        if not ndjson:
+            yield '{"mutual_funds": ['
+        for fund in funds:
+            last = (fund.get(sort_field), fund["_id"])
+            fund["_id"] = str(fund["_id"])
+            if ndjson:
+                yield app.json.dumps(fund) + "\n"
+            else:
+                yield ("," if count else "") + app.json.dumps(fund)
+            count += 1
+        next_cursor = None
+        if limit and count == limit and last:
+            value, last_id = last
+            next_cursor = _encode_cursor(str(value) if sort_field == "_id" else value, last_id)
+        if ndjson:
+            yield json.dumps({"next_cursor": next_cursor}) + "\n"
+        else:
+            yield '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    return Response(stream_with_context(generate()), mimetype=mimetype), 200
 
 @app.route('/api/mutual_funds/<string:fund_name>', methods=['GET'])
 def get_mutual_fund_by_name(fund_name):
@@ -57,22 +127,16 @@ def get_mutual_fund_by_name(fund_name):
     fund["_id"] = str(fund["_id"])
     return jsonify({"mutual_fund": fund}), 200
 
-def run_orc_agent_with_callback(user_inputs, task_id):
+@app.route('/api/mutual_funds/<string:fund_name>/why', methods=['GET'])
+def get_mutual_fund_reason(fund_name):
+    """Plain-language explanation for a fund; precomputed by `python -m why.batch`."""
     try:
-        result = run_orc_agent(user_inputs)
-        set_response_store(task_id, {
-            "status": "completed",
-            "result": result,
-            "error": None
-        })
-        return result
+        reason = get_fund_reason(unquote(fund_name))
     except Exception as e:
-        set_response_store(task_id, {
-            "status": "error",
-            "result": None,
-            "error": str(e)
-        })
-        raise
+        return jsonify({"error": str(e)}), 500
+    if reason is None:
+        return jsonify({"error": "Mutual fund not found"}), 404
+    return jsonify({"fund_name": unquote(fund_name), "advisor_reason": reason}), 200
 
 @app.route('/startTask', methods=['POST'])
 def start_task():
@@ -96,14 +160,8 @@ def start_task():
         # Generate unique task ID
         task_id = str(uuid.uuid4())
         
-        # Store initial status
-        set_response_store(task_id, {
-            "status": "processing",
-            "result": None,
-            "error": None
-        })
-        # Submit async task
-        future = executor.submit(run_orc_agent_with_callback, parsed_inputs, task_id)
+        # Queue for the worker processes (worker.py); progress is pushed to the "task:<task_id>" room
+        enqueue_orc_report(task_id, parsed_inputs, data.get("type"))
         
         return jsonify({
             "status": "processing", 
@@ -115,6 +173,26 @@ def start_task():
         print("❌ Error in /startTask:", str(e))
         return jsonify({"status": "error", "message": str(e)}), 500
     
+@socketio.on('subscribe_task')
+def subscribe_task(data):
+    """Join the task's room and replay its current state, so late subscribers miss nothing."""
+    task_id = (data or {}).get("task_id")
+    if not task_id:
+        emit("task_error", {"error": "task_id is required"})
+        return
+    join_room(task_events.room(task_id))
+    state = task_events.replay_state(task_id)
+    if state is None:
+        emit("task_error", {"task_id": task_id, "error": "Task not found"})
+        return
+    emit(state.pop("event"), state)
+
+@socketio.on('unsubscribe_task')
+def unsubscribe_task(data):
+    task_id = (data or {}).get("task_id")
+    if task_id:
+        leave_room(task_events.room(task_id))
+
 @app.route('/getReportByType', methods=['POST'])
 def get_report_by_type():
     try:
@@ -209,137 +287,6 @@ def get_report_by_type():
         return jsonify({"error": str(e)}), 500
 
     
-def extract_investment_data(agent_text: str, name: str, type: int) -> dict:
-    result = {
-        "type": type,
-        "name": name,
-        "monthly_allocations": {},
-        "lumpsum_allocations": {},
-        "monthly_mutual_funds": [],
-        "lumpsum_mutual_funds": [],
-        "monthly_etfs": [],
-        "lumpsum_etfs": [],
-        "monthly_bonds": [],
-        "lumpsum_bonds": [],
-        "monthly_sgbs": [],
-        "lumpsum_sgbs": []
-    }
-
-    # 1) Clean markdown-style code block wrapper (```json ... ```)
-    agent_text = agent_text.strip()
-
-    if not agent_text:
-        print(f"⚠️ agent_text is empty for type {type}")
-        return result
-
-    if agent_text.startswith("```"):
-        agent_text = re.sub(r"^```(?:json)?\s*", "", agent_text, flags=re.IGNORECASE)
-        agent_text = re.sub(r"```$", "", agent_text.strip())
-
-    # 2) Parse JSON
-    try:
-        payload = json.loads(agent_text)
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON decode error for type {type}: {e}")
-        print(f"🚨 Raw agent_text (first 300 chars):\n{repr(agent_text[:300])}")
-        return result
-
-    # 3) Extract data
-    rec = payload.get("Investment Portfolio Recommendation", {})
-
-    # Monthly Investment
-    monthly = rec.get("Monthly Investment", {})
-    result["monthly_allocations"] = monthly.get("Allocation", {})
-
-    for mf in monthly.get("Mutual Funds Details", []):
-        result["monthly_mutual_funds"].append({
-            "name": mf.get("Fund Name"),
-            "category": mf.get("Category"),
-            "return_5y": mf.get("5-Year Return"),
-            "expense_ratio": mf.get("Expense Ratio"),
-            "key_metrics": mf.get("Key Metrics")
-        })
-
-    for etf in monthly.get("ETFs Details", []):
-        result["monthly_etfs"].append({
-            "name": etf.get("ETF Name"),
-            "return_3y": etf.get("3-Year Return"),
-            "expense_ratio": etf.get("Expense Ratio"),
-            "standard_deviation": etf.get("Standard Deviation"),
-            "key_metrics": etf.get("Key Metrics")
-        })
-
-    for bond in monthly.get("Bonds Details", []):
-        result["monthly_bonds"].append({
-            "name": bond.get("Bond Name"),
-            "ytm": bond.get("YTM"),
-            "coupon_rate": bond.get("Coupon Rate"),
-            "maturity_date": bond.get("Maturity Date"),
-            "last_traded_price": bond.get("Last Traded Price"),
-            "key_metrics": bond.get("Key Metrics")
-        })
-
-    for sgb in monthly.get("SGBs Details", []):
-        result["monthly_sgbs"].append({
-            "name": sgb.get("Bond Name"),
-            "last_traded_price": sgb.get("Last Traded Price (LTP)"),
-            "interest_rate": sgb.get("Interest Rate"),
-            "maturity_date": sgb.get("Maturity Date"),
-            "expected_returns": sgb.get("Expected Returns")
-        })
-
-    # Lumpsum Investment
-    lumpsum = rec.get("Lumpsum Investment", {})
-    result["lumpsum_allocations"] = lumpsum.get("Allocation", {})
-
-    for mf in lumpsum.get("Mutual Funds Details", []):
-        result["lumpsum_mutual_funds"].append({
-            "name": mf.get("Fund Name"),
-            "category": mf.get("Category"),
-            "return_5y": mf.get("5-Year Return"),
-            "expense_ratio": mf.get("Expense Ratio"),
-            "key_metrics": mf.get("Key Metrics")
-        })
-
-    for etf in lumpsum.get("ETFs Details", []):
-        result["lumpsum_etfs"].append({
-            "name": etf.get("ETF Name"),
-            "return_3y": etf.get("3-Year Return"),
-            "expense_ratio": etf.get("Expense Ratio"),
-            "standard_deviation": etf.get("Standard Deviation"),
-            "key_metrics": etf.get("Key Metrics")
-        })
-
-    for bond in lumpsum.get("Bonds Details", []):
-        result["lumpsum_bonds"].append({
-            "name": bond.get("Bond Name"),
-            "ytm": bond.get("YTM"),
-            "coupon_rate": bond.get("Coupon Rate"),
-            "maturity_date": bond.get("Maturity Date"),
-            "last_traded_price": bond.get("Last Traded Price"),
-            "key_metrics": bond.get("Key Metrics")
-        })
-
-    for sgb in lumpsum.get("SGBs Details", []):
-        result["lumpsum_sgbs"].append({
-            "name": sgb.get("Bond Name"),
-            "last_traded_price": sgb.get("Last Traded Price (LTP)"),
-            "interest_rate": sgb.get("Interest Rate"),
-            "maturity_date": sgb.get("Maturity Date"),
-            "expected_returns": sgb.get("Expected Returns")
-        })
-
-    # 4) Save to MongoDB (if MongoDB collection is defined)
-    print("📊 Extracted investment data:", result)
-    try:
-        report_collection.find_one_and_delete({"type": type})
-        report_collection.insert_one(result)
-        print(f"✅ Investment data for type {type} saved to MongoDB")
-    except Exception as e:
-        print(f"❌ Error saving to MongoDB for type {type}: {e}")
-
-    return result
-
 @app.route('/getTaskResult/<task_id>', methods=['GET'])
 def get_task_result(task_id):
     results = result_collection.find_one({"task_id": task_id})
@@ -352,7 +299,7 @@ def get_task_result(task_id):
 @app.route('/getResult/<task_id>', methods=['GET'])
 def get_result(task_id):
     """Endpoint to check task status and get result"""
-    task_data = get_response_store(task_id)
+    task_data = task_store.get_task(task_id)
     
     if not task_data:
         return jsonify({"error": "Task not found"}), 404
@@ -360,13 +307,13 @@ def get_result(task_id):
     if task_data["status"] == "processing":
         return jsonify({
             "status": "processing",
-            "message": "Task is still being processed"
+            "message": "Task is still being processed",
+            "tools": task_data["tools"]
         }), 202
     elif task_data["status"] == "completed":
-        result = extract_investment_data(task_data["result"], task_id)
         return jsonify({
             "status": "completed",
-            "result": result
+            "result": task_data["result"]
         }), 200
     elif task_data["status"] == "error":
         return jsonify({
@@ -381,7 +328,7 @@ def add_stratergies():
         if not data or "strategies" not in data:
             return jsonify({"error": "Missing 'strategies' in request body"}), 400
 
-        result = stratergy_collection.insert_one(data)
+        result = save_strategies(data)
         return jsonify({
             "message": "Strategies added successfully",
             "inserted_id": str(result.inserted_id)
@@ -392,14 +339,13 @@ def add_stratergies():
 import re
 from typing import Tuple
 
-def _parse_expected_return(text: str | None, years_fallback: float) -> Tuple[float, float]:
+def _parse_expected_return_terms(text: str | None) -> Tuple[float, float | None, bool]:
     """
-    Returns (annual_rate_float, years_used).
-    If 'total' is present, converts total return over T years to annualised (CAGR).
-    Otherwise treats % as annual rate.
+    Parse the request-independent parts of an expectedReturn string:
+    (pct_as_fraction, years_in_text_or_None, is_total).
     """
     if not text:
-        return 0.0, float(years_fallback or 0.0)
+        return 0.0, None, False
 
     s = re.sub(r"\s+", " ", (text or "").strip().lower())
 
@@ -413,102 +359,198 @@ def _parse_expected_return(text: str | None, years_fallback: float) -> Tuple[flo
         pct = (min(nums) + max(nums)) / 2.0
     pct /= 100.0
 
-    # years (fallback if not present)
+    # years (None -> use the request's horizon)
     y = re.search(r"(\d+(?:\.\d+)?)\s*(?:years?|yrs?|yr|y)", s)
-    years = float(y.group(1)) if y else float(years_fallback or 0.0)
+    years = float(y.group(1)) if y else None
 
     # detect modes
     is_per_annum = any(k in s for k in ("p.a", "per annum", "pa", "cagr", "annualised", "annualized"))
     is_total = ("total" in s or "cumulative" in s or "overall" in s) and not is_per_annum
 
+    return float(pct), years, bool(is_total)
+
+def _resolve_expected_return(pct: float, years: float | None, is_total: bool, years_fallback: float) -> Tuple[float, float]:
+    """Turn parsed expectedReturn terms into (annual_rate_float, years_used)."""
+    years = float(years) if years is not None else float(years_fallback or 0.0)
     if is_total and years > 0:
         annual = (1.0 + pct) ** (1.0 / years) - 1.0
     else:
         annual = pct
-
     return float(annual), float(years)
 
-def _monthly_rate(annual_rate: float) -> float:
-    """Convert effective annual rate to equivalent monthly rate."""
-    return (1.0 + float(annual_rate)) ** (1.0 / 12.0) - 1.0
-
-def _fv_sip(monthly: float, annual_rate: float, years: float, *, annuity_due: bool = False) -> float:
-    """Future value of a monthly SIP with monthly compounding."""
-    n = int(round(12 * max(years, 0)))
-    if n <= 0 or monthly <= 0:
-        return 0.0
-    r_m = _monthly_rate(annual_rate)
-    if abs(r_m) < 1e-12:
-        fv = monthly * n
-    else:
-        fv = monthly * (((1 + r_m) ** n - 1) / r_m)
-    return fv * (1 + r_m if annuity_due else 1.0)  # set annuity_due=True if you truly invest at start of month
+def _parse_expected_return(text: str | None, years_fallback: float) -> Tuple[float, float]:
+    """
+    Returns (annual_rate_float, years_used).
+    If 'total' is present, converts total return over T years to annualised (CAGR).
+    Otherwise treats % as annual rate.
+    """
+    if not text:
+        return 0.0, float(years_fallback or 0.0)
+    return _resolve_expected_return(*_parse_expected_return_terms(text), years_fallback)
 
-def _fv_lumpsum(amount: float, annual_rate: float, years: float) -> float:
-    """Future value of a lumpsum using the SAME monthly comp convention."""
-    n = int(round(12 * max(years, 0)))
-    if n <= 0 or amount <= 0:
-        return float(amount)
-    r_m = _monthly_rate(annual_rate)
-    return float(amount) * (1 + r_m) ** n
+ASSET_PCT_KEYS = [("Mutual Funds", "MutualFunds%"), ("ETFs", "ETFs%"), ("Bonds", "Bonds%"), ("SGBs", "SGBs%")]
 
-def _compute_amounts_from_percentages(time: float, money: int, lumpsum: int, alloc: dict, expectedReturn: str) -> dict:
-    """Compute MF/ETF/Bond rupee amounts from percentage fields in `alloc`,
-    and compute maturity amounts from time, money, lumpsum, and expectedReturn."""
+def _compile_strategy(strategy: dict, doc_type=None) -> dict:
+    """Pre-parse one strategy template into JSON-serialisable allocation vectors and return terms."""
+    alloc = strategy.get("allocation") or {}
     monthly_alloc = alloc.get("monthly", {}) or {}
     lumpsum_alloc = alloc.get("lumpsum", {}) or {}
+    pct, years, is_total = _parse_expected_return_terms(strategy.get("expectedReturn"))
+    return {
+        "name": strategy.get("name"),
+        "description": strategy.get("description"),
+        "riskLevel": strategy.get("riskLevel"),
+        "expectedReturn": strategy.get("expectedReturn"),
+        "templateAllocation": alloc,
+        "type": doc_type,
+        "monthlyPct": [monthly_alloc.get(key, 0) for _, key in ASSET_PCT_KEYS],
+        "lumpsumPct": [lumpsum_alloc.get(key, 0) for _, key in ASSET_PCT_KEYS],
+        "returnTerms": [pct, years, is_total],
+    }
 
-    # monthly amounts
-    amt_mf_monthly  = int(round(money * (monthly_alloc.get("MutualFunds%", 0) / 100.0)))
-    amt_etf_monthly = int(round(money * (monthly_alloc.get("ETFs%",        0) / 100.0)))
-    amt_bond_monthly= int(round(money * (monthly_alloc.get("Bonds%",       0) / 100.0)))
-    amt_sgb_monthly = int(round(money * (monthly_alloc.get("SGBs%",        0) / 100.0)))
-
-    # lumpsum amounts
-    amt_mf_lumpsum  = int(round(lumpsum * (lumpsum_alloc.get("MutualFunds%", 0) / 100.0)))
-    amt_etf_lumpsum = int(round(lumpsum * (lumpsum_alloc.get("ETFs%",        0) / 100.0)))
-    amt_bond_lumpsum= int(round(lumpsum * (lumpsum_alloc.get("Bonds%",       0) / 100.0)))
-    amt_sgb_lumpsum = int(round(lumpsum * (lumpsum_alloc.get("SGBs%",        0) / 100.0)))
+def _compute_amounts_from_compiled(time: float, money: int, lumpsum: int, compiled: dict) -> dict:
+    """Compute rupee allocations and maturity amounts from a compiled strategy template."""
+    alloc = compiled["templateAllocation"]
 
     # returns / FV
-    annual_rate, years = _parse_expected_return(expectedReturn, time)
-
-    total_invested_monthly = int(round(max(money, 0) * 12 * max(years, 0)))
-    total_invested_lumpsum = int(round(max(lumpsum, 0)))
-    total_invested = total_invested_monthly + total_invested_lumpsum
+    annual_rate, years = _resolve_expected_return(*compiled["returnTerms"], time)
 
     # SIP assumed end-of-month; set annuity_due=True if you want start-of-month
-    fv_monthly = _fv_sip(float(money), float(annual_rate), float(years), annuity_due=False)
-    fv_lumpsum = _fv_lumpsum(float(lumpsum), float(annual_rate), float(years))
-    maturity_total = fv_monthly + fv_lumpsum
-    returns_amt = maturity_total - total_invested
+    fv = {k: float(v) for k, v in projection.project(money, lumpsum, annual_rate, years, annuity_due=False).items()}
+    names = [name for name, _ in ASSET_PCT_KEYS]
 
     return {
-        "monthlyAmounts": {
-            "Mutual Funds": amt_mf_monthly,
-            "ETFs": amt_etf_monthly,
-            "Bonds": amt_bond_monthly,
-            "SGBs": amt_sgb_monthly,
-        },
-        "lumpsumAmounts": {
-            "Mutual Funds": amt_mf_lumpsum,
-            "ETFs": amt_etf_lumpsum,
-            "Bonds": amt_bond_lumpsum,
-            "SGBs": amt_sgb_lumpsum,
-        },
-        "monthlyPercentages": monthly_alloc,
-        "lumpsumPercentages": lumpsum_alloc,
+        "monthlyAmounts": dict(zip(names, projection.allocate(money, compiled["monthlyPct"]).tolist())),
+        "lumpsumAmounts": dict(zip(names, projection.allocate(lumpsum, compiled["lumpsumPct"]).tolist())),
+        "monthlyPercentages": alloc.get("monthly", {}) or {},
+        "lumpsumPercentages": alloc.get("lumpsum", {}) or {},
         "maturity": {
-            "TotalInvested": int(round(total_invested)),
-            "Returns": int(round(returns_amt)),
-            "MaturityAmount": int(round(maturity_total)),
-            "monthly_FV": int(round(fv_monthly)),
-            "lumpsum_FV": int(round(fv_lumpsum)),
+            "TotalInvested": int(round(fv["invested"])),
+            "Returns": int(round(fv["returns"])),
+            "MaturityAmount": int(round(fv["maturity"])),
+            "monthly_FV": int(round(fv["monthly_fv"])),
+            "lumpsum_FV": int(round(fv["lumpsum_fv"])),
             "annualRateUsed": float(annual_rate),
             "yearsUsed": float(years),
         },
     }
 
+def _compute_amounts_from_percentages(time: float, money: int, lumpsum: int, alloc: dict, expectedReturn: str) -> dict:
+    """Compute MF/ETF/Bond rupee amounts from percentage fields in `alloc`,
+    and compute maturity amounts from time, money, lumpsum, and expectedReturn."""
+    compiled = _compile_strategy({"allocation": alloc, "expectedReturn": expectedReturn})
+    return _compute_amounts_from_compiled(time, money, lumpsum, compiled)
+
+# Parsed strategy templates per category: in-process (short TTL so other
+# workers pick up invalidations) backed by Redis; /addStratergy invalidates.
+STRATEGY_CACHE_TTL = int(os.environ.get("STRATEGY_CACHE_TTL", "86400"))
+# bump the version when the compiled template layout changes (v2: percentages, not fractions)
+STRATEGY_CACHE_PREFIX = "strategy_cache:v2"
+strategy_cache = TTLCache(maxsize=256, ttl=int(os.environ.get("STRATEGY_LOCAL_CACHE_TTL", "60")))
+strategy_cache_lock = Lock()
+
+def get_compiled_strategies(category: int) -> list:
+    """Compiled strategy templates for a category: local cache, then Redis, then MongoDB."""
+    with strategy_cache_lock:
+        compiled = strategy_cache.get(category)
+    if compiled is not None:
+        return compiled
+
+    compiled = None
+    try:
+        cached = redis_client.get(f"{STRATEGY_CACHE_PREFIX}:{category}")
+        if cached:
+            compiled = json.loads(cached)
+    except redis.RedisError as e:
+        print(f"⚠️ Strategy cache read failed for {category}: {e}")
+
+    if compiled is None:
+        compiled = [
+            _compile_strategy(s, doc.get("type"))
+            for doc in stratergy_collection.find({"type": category})
+            for s in (doc.get("strategies") or [])
+        ]
+        if not compiled:
+            # never cache a miss: the category may be seeded (or the read recover) any time
+            return compiled
+        try:
+            redis_client.set(f"{STRATEGY_CACHE_PREFIX}:{category}", json.dumps(compiled), ex=STRATEGY_CACHE_TTL)
+        except redis.RedisError as e:
+            print(f"⚠️ Strategy cache write failed for {category}: {e}")
+
+    with strategy_cache_lock:
+        strategy_cache[category] = compiled
+    return compiled
+
+def invalidate_strategy_cache(category: int | None = None):
+    """Drop cached templates for one category, or for all categories."""
+    if category is not None:
+        try:
+            category = int(category)
+        except (TypeError, ValueError):
+            category = None
+    with strategy_cache_lock:
+        if category is None:
+            strategy_cache.clear()
+        else:
+            strategy_cache.pop(category, None)
+    try:
+        if category is None:
+            keys = list(redis_client.scan_iter("strategy_cache:*"))
+            if keys:
+                redis_client.delete(*keys)
+        else:
+            redis_client.delete(f"{STRATEGY_CACHE_PREFIX}:{category}")
+    except redis.RedisError as e:
+        print(f"⚠️ Strategy cache invalidation failed: {e}")
+
+def save_strategies(doc: dict, replace: bool = False):
+    """
+    The one write path for strategy templates: insert `doc` (after deleting
+    its type's existing documents when replace is set) and drop the cached
+    templates for that type. Returns the insert result.
+    """
+    if replace:
+        stratergy_collection.delete_many({"type": doc.get("type")})
+    result = stratergy_collection.insert_one(doc)
+    invalidate_strategy_cache(doc.get("type"))
+    return result
+
+def _strategy_category(time: float, money: int, lumpsum: int) -> int | None:
+    """Strategy template type for a horizon, monthly amount and lumpsum; None when no band matches."""
+    category = None
+    if 100 <= money < 500:
+        if 1 <= time < 3:
+            category = 11
+        elif 3 <= time < 6:
+            category = 12
+        elif time >= 6:
+            category = 13
+    elif 500 <= money < 10500:
+        if 1 <= time < 3:
+            category = 21
+        elif 3 <= time < 6:
+            category = 22
+        elif time >= 6:
+            category = 23
+    elif money >= 10500:
+        if 1 <= time < 3:
+            category = 31
+        elif 3 <= time < 6:
+            category = 32
+        elif time >= 6:
+            category = 33
+
+    # no monthly / horizon band (e.g. money < 100): a lumpsum cannot refine it
+    if category is None:
+        return None
+    if 1000 <= lumpsum < 10500:
+        category = category * 10 + 1
+    elif lumpsum >= 10500:
+        category = category * 10 + 2
+
+    return category
+
 @app.route('/getStratergy', methods=['POST'])
 def get_strategy():
     try:
@@ -530,78 +572,175 @@ def get_strategy():
             return jsonify({"error": "Invalid types for yearsToAchieve, monthlyInvestment, or lumpsumInvestment"}), 400
 
         # Determine category (same logic as before)
-        category = None
-        if 100 <= money < 500:
-            if 1 <= time < 3:
-                category = 11
-            elif 3 <= time < 6:
-                category = 12
-            elif time >= 6:
-                category = 13
-        elif 500 <= money < 10500:
-            if 1 <= time < 3:
-                category = 21
-            elif 3 <= time < 6:
-                category = 22
-            elif time >= 6:
-                category = 23
-        elif money >= 10500:
-            if 1 <= time < 3:
-                category = 31
-            elif 3 <= time < 6:
-                category = 32
-            elif time >= 6:
-                category = 33
-
-        if 1000 <= lumpsum < 10500:
-            category = category * 10 + 1
-        elif lumpsum >= 10500:
-            category = category * 10 + 2
-
+        category = _strategy_category(time, money, lumpsum)
         if category is None:
             return jsonify({"message": "No matching category for the given inputs."}), 400
 
-        # Fetch matching strategy docs
-        docs = list(stratergy_collection.find({"type": category}))
-        if not docs:
+        # Fetch pre-parsed strategy templates (cached per category)
+        compiled_strategies = get_compiled_strategies(category)
+        if not compiled_strategies:
             return jsonify({"message": "No strategies found for the given criteria."}), 404
 
-        # Build response: for each strategy in each doc, compute rupee allocations from %
+        # Build response: for each strategy, compute rupee allocations from %
         out_strategies = []
-        for doc in docs:
-            for s in (doc.get("strategies") or []):
-                alloc = s.get("allocation") or {}
-                expectedReturn = s.get("expectedReturn")
-                computed = _compute_amounts_from_percentages(time, money, lumpsum, alloc, expectedReturn)
-                out_strategies.append({
-                    "name": s.get("name"),
-                    "description": s.get("description"),
-                    "riskLevel": s.get("riskLevel"),
-                    "expectedReturn": s.get("expectedReturn"),
-                    "maturityAmount": computed["maturity"],  
-                    "templateAllocation": alloc,                 # original template from DB
-                    "computedAllocation": {                      # final monthly and lumpsum split in ₹
-                        "monthlyAmounts": computed["monthlyAmounts"],
-                        "lumpsumAmounts": computed["lumpsumAmounts"],
-                        "totalMonthly": money,
-                        "totalLumpsum": lumpsum
-                    },
-                    "type": doc.get("type")
-                })
+        for compiled in compiled_strategies:
+            computed = _compute_amounts_from_compiled(time, money, lumpsum, compiled)
+            out_strategies.append({
+                "name": compiled["name"],
+                "description": compiled["description"],
+                "riskLevel": compiled["riskLevel"],
+                "expectedReturn": compiled["expectedReturn"],
+                "maturityAmount": computed["maturity"],  
+                "templateAllocation": compiled["templateAllocation"],  # original template from DB
+                "computedAllocation": {                      # final monthly and lumpsum split in ₹
+                    "monthlyAmounts": computed["monthlyAmounts"],
+                    "lumpsumAmounts": computed["lumpsumAmounts"],
+                    "totalMonthly": money,
+                    "totalLumpsum": lumpsum
+                },
+                "type": compiled["type"]
+            })
 
         return jsonify({"strategy": out_strategies}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
-def set_response_store(task_id, data):
-    redis_client.set(f"response_store:{task_id}", pickle.dumps(data), ex=3600)  # 1 hour expiry
-
-def get_response_store(task_id):
-    data = redis_client.get(f"response_store:{task_id}")
-    if data:
-        return pickle.loads(data)
-    return None
+PROJECTION_MAX_CELLS = 10000
+PROJECTION_MAX_CURVES = 200
+PROJECTION_MAX_HORIZONS = 100
+PROJECTION_MAX_YEARS = 100
+
+@app.route('/getProjection', methods=['POST'])
+def get_projection():
+    """
+    Sensitivity grid of maturity amounts across annual rates x horizons in one call.
+    Body: monthlyInvestment, lumpsumInvestment, years (list of at most
+    PROJECTION_MAX_HORIZONS values, each 0..PROJECTION_MAX_YEARS), and either
+    annualRates (list of fractions, e.g. 0.12) or expectedReturn (template string).
+    Optional: allocation ({"monthly": {...%}, "lumpsum": {...%}}), curves (bool).
+    """
+    try:
+        data = request.get_json() or {}
+        try:
+            money = float(data.get("monthlyInvestment", 0) or 0)
+            lumpsum = float(data.get("lumpsumInvestment", 0) or 0)
+            years = [float(y) for y in np.atleast_1d(data.get("years", []))]
+            if "annualRates" in data:
+                rates = [float(r) for r in np.atleast_1d(data["annualRates"])]
+            else:
+                rates = [_parse_expected_return(data.get("expectedReturn"), years[0] if years else 0)[0]]
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid monthlyInvestment, lumpsumInvestment, years or annualRates"}), 400
+        if not years or not rates:
+            return jsonify({"error": "years and annualRates (or expectedReturn) are required"}), 400
+        if len(years) > PROJECTION_MAX_HORIZONS:
+            return jsonify({"error": f"Too many years (max {PROJECTION_MAX_HORIZONS})"}), 400
+        if not all(0 <= y <= PROJECTION_MAX_YEARS for y in years):
+            return jsonify({"error": f"years must be between 0 and {PROJECTION_MAX_YEARS}"}), 400
+        if len(years) * len(rates) > PROJECTION_MAX_CELLS:
+            return jsonify({"error": f"Grid too large (max {PROJECTION_MAX_CELLS} cells)"}), 400
+
+        grid = projection.sensitivity_grid(money, lumpsum, rates, years, annuity_due=False)
+        out = {
+            "annualRates": rates,
+            "years": years,
+            "maturity": np.rint(grid["maturity"]).astype(int).tolist(),     # [rate][year]
+            "invested": np.rint(grid["invested"]).astype(int).tolist(),
+            "returns": np.rint(grid["returns"]).astype(int).tolist(),
+        }
+
+        alloc = data.get("allocation")
+        if isinstance(alloc, dict):
+            monthly_pct = [(alloc.get("monthly") or {}).get(key, 0) for _, key in ASSET_PCT_KEYS]
+            lumpsum_pct = [(alloc.get("lumpsum") or {}).get(key, 0) for _, key in ASSET_PCT_KEYS]
+            out["monthlyAmounts"] = dict(zip([n for n, _ in ASSET_PCT_KEYS], projection.allocate(money, monthly_pct).tolist()))
+            out["lumpsumAmounts"] = dict(zip([n for n, _ in ASSET_PCT_KEYS], projection.allocate(lumpsum, lumpsum_pct).tolist()))
+
+        if data.get("curves"):
+            if len(years) * len(rates) > PROJECTION_MAX_CURVES:
+                return jsonify({"error": f"Too many curves requested (max {PROJECTION_MAX_CURVES})"}), 400
+            rate_grid, year_grid = np.meshgrid(rates, years, indexing="ij")
+            months, corpus = projection.corpus_curves(money, lumpsum, rate_grid, year_grid)
+            out["curves"] = {
+                "months": months.tolist(),
+                # one row per (rate, year) cell in row-major order; null past the horizon
+                "corpus": [[None if np.isnan(v) else int(round(v)) for v in row] for row in corpus],
+            }
+
+        return jsonify(out), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+GOAL_MAX_PATHS = 200000
+GOAL_MAX_YEARS = 50
+
+@app.route('/getGoalProbability', methods=['POST'])
+def get_goal_probability():
+    """
+    Monte Carlo probability of reaching a target corpus.
+    Body: yearsToAchieve, monthlyInvestment, lumpsumInvestment, target.
+    Optional: allocation ({"monthly": {...%}, "lumpsum": {...%}}); without it
+    every strategy template for the inputs' category is simulated.
+    yearsToAchieve must be above 0 and at most GOAL_MAX_YEARS.
+    Optional: paths (default 100000, max GOAL_MAX_PATHS), seed (default 42).
+    """
+    try:
+        data = request.get_json() or {}
+        try:
+            time = float(data.get("yearsToAchieve"))
+            money = int(data.get("monthlyInvestment", 0) or 0)
+            lumpsum = int(data.get("lumpsumInvestment", 0) or 0)
+            target = float(data.get("target")) if data.get("target") is not None else None
+            paths = int(data.get("paths", 100000))
+            seed = int(data.get("seed", 42))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid yearsToAchieve, monthlyInvestment, lumpsumInvestment, target, paths or seed"}), 400
+        if not 1 <= paths <= GOAL_MAX_PATHS:
+            return jsonify({"error": f"paths must be between 1 and {GOAL_MAX_PATHS}"}), 400
+        if not 0 < time <= GOAL_MAX_YEARS:
+            return jsonify({"error": f"yearsToAchieve must be above 0 and at most {GOAL_MAX_YEARS}"}), 400
+
+        alloc = data.get("allocation")
+        if isinstance(alloc, dict):
+            templates = [{"name": data.get("name", "custom"), "templateAllocation": alloc}]
+        else:
+            category = _strategy_category(time, money, lumpsum)
+            if category is None:
+                return jsonify({"message": "No matching category for the given inputs."}), 400
+            templates = get_compiled_strategies(category)
+            if not templates:
+                return jsonify({"message": "No strategies found for the given criteria."}), 404
+
+        out_strategies = []
+        for compiled in templates:
+            template_alloc = compiled["templateAllocation"] or {}
+            simulated = monte_carlo.simulate_goal(
+                money, lumpsum, time,
+                template_alloc.get("monthly"), template_alloc.get("lumpsum"),
+                target=target, paths=paths, seed=seed,
+            )
+            out_strategies.append({
+                "name": compiled.get("name"),
+                "riskLevel": compiled.get("riskLevel"),
+                "expectedReturn": compiled.get("expectedReturn"),
+                "invested": int(round(simulated["invested"])),
+                "mean": int(round(simulated["mean"])),
+                "percentiles": {k: int(round(v)) for k, v in simulated["percentiles"].items()},
+                "probability": simulated.get("probability"),
+            })
+
+        return jsonify({
+            "target": target,
+            "paths": paths,
+            "seed": seed,
+            "assumptions": monte_carlo.load_asset_assumptions(),
+            "strategy": out_strategies,
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
     socketio.run(app, debug=True, port=5000)
@@ -0,0 +1,133 @@
+from cachetools import TTLCache, cached
+import numpy as np
+import os
+from db import mutual_funds_collection, etf_collection, bonds_collection, sgb_collection
+
+# Monte Carlo goal-probability engine for the MF / ETF / Bond / SGB strategy
+# mixes. Each sleeve (monthly SIP, lumpsum) is a lognormal portfolio of the
+# four asset classes. The SIP sleeve is stepped month by month across all
+# paths at once; the lumpsum sleeve only needs its terminal value, drawn in
+# closed form from the SIP sleeve's summed shocks plus one independent
+# normal, which keeps the correlation between the sleeves exact.
+
+ASSETS = ["Mutual Funds", "ETFs", "Bonds", "SGBs"]
+ASSET_PCT_KEYS = ["MutualFunds%", "ETFs%", "Bonds%", "SGBs%"]
+
+# (annual return, annual volatility) used when the catalog has no usable data
+ASSET_DEFAULTS = {
+    "Mutual Funds": (0.12, 0.15),
+    "ETFs": (0.11, 0.16),
+    "Bonds": (0.07, 0.03),
+    "SGBs": (0.09, 0.15),
+}
+
+ASSET_CORRELATION = np.array([
+    [1.00, 0.90, 0.10, 0.00],
+    [0.90, 1.00, 0.10, 0.00],
+    [0.10, 0.10, 1.00, 0.10],
+    [0.00, 0.00, 0.10, 1.00],
+])
+
+PERCENTILES = [5, 10, 25, 50, 75, 90, 95]
+MC_CHUNK_PATHS = int(os.getenv("MC_CHUNK_PATHS", "50000"))
+
+def _median(values):
+    nums = [float(v) for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    return float(np.median(nums)) if nums else None
+
+@cached(TTLCache(maxsize=1, ttl=3600))
+def load_asset_assumptions() -> dict:
+    """
+    Per-asset (annual return, annual volatility) from the stored fund metrics:
+    median 5Y return and standard deviation for MFs / ETFs, median YTM for
+    bonds and median 1Y change for SGBs. Falls back to ASSET_DEFAULTS.
+    """
+    assumptions = dict(ASSET_DEFAULTS)
+    try:
+        for asset, collection in (("Mutual Funds", mutual_funds_collection), ("ETFs", etf_collection)):
+            docs = list(collection.find({}, {"_id": 0, "5_year_return": 1, "standard_deviation": 1}))
+            mu = _median(d.get("5_year_return") for d in docs)
+            sigma = _median(d.get("standard_deviation") for d in docs)
+            default_mu, default_sigma = ASSET_DEFAULTS[asset]
+            assumptions[asset] = (mu / 100 if mu is not None else default_mu,
+                                  sigma / 100 if sigma is not None else default_sigma)
+
+        ytm = _median(d.get("YTM") for d in bonds_collection.find({"YTM": {"$exists": True}}, {"_id": 0, "YTM": 1}))
+        if ytm is not None:
+            assumptions["Bonds"] = (ytm / 100, ASSET_DEFAULTS["Bonds"][1])
+
+        sgb = _median(d.get("365 D % CHNG \n") for d in sgb_collection.find({}, {"_id": 0, "365 D % CHNG \n": 1}))
+        if sgb is not None:
+            assumptions["SGBs"] = (sgb / 100, ASSET_DEFAULTS["SGBs"][1])
+    except Exception as e:
+        print(f"⚠️ Using default asset assumptions: {e}")
+    return assumptions
+
+def _weights(alloc: dict) -> np.ndarray:
+    w = np.array([float((alloc or {}).get(key, 0) or 0) for key in ASSET_PCT_KEYS])
+    return w / w.sum() if w.sum() > 0 else w
+
+def _sleeve_log_params(w, mu, cov):
+    """Monthly log-return mean and volatility of a portfolio with weights w."""
+    annual_mu = float(w @ mu)
+    annual_var = float(w @ cov @ w)
+    sigma_m = np.sqrt(annual_var / 12.0)
+    mean_m = np.log1p(annual_mu) / 12.0 - 0.5 * sigma_m ** 2
+    return mean_m, sigma_m
+
+def simulate_goal(monthly: float, lumpsum: float, years: float, monthly_alloc: dict, lumpsum_alloc: dict,
+                  target: float = None, paths: int = 100000, seed: int = 42, assumptions: dict = None) -> dict:
+    """
+    Simulate terminal corpus for SIP + lumpsum over `years`. Returns corpus
+    percentiles, mean, invested amount and (when target is given) the
+    probability of ending at or above target.
+    """
+    assumptions = assumptions or load_asset_assumptions()
+    mu = np.array([assumptions[a][0] for a in ASSETS])
+    vol = np.array([assumptions[a][1] for a in ASSETS])
+    cov = ASSET_CORRELATION * np.outer(vol, vol)
+
+    n = int(round(12 * max(years, 0)))
+    w_m, w_l = _weights(monthly_alloc), _weights(lumpsum_alloc)
+    mean_m, sigma_m = _sleeve_log_params(w_m, mu, cov)
+    mean_l, sigma_l = _sleeve_log_params(w_l, mu, cov)
+    cross = float(w_m @ cov @ w_l) / 12.0
+    # lumpsum shock = a * (SIP shock) + b * (independent shock)
+    a = cross / sigma_m if sigma_m > 0 else 0.0
+    b = np.sqrt(max(sigma_l ** 2 - a ** 2, 0.0))
+
+    corpus = np.empty(paths)
+    children = np.random.SeedSequence(seed).spawn(-(-paths // MC_CHUNK_PATHS))
+    for start, child in zip(range(0, paths, MC_CHUNK_PATHS), children):
+        size = min(MC_CHUNK_PATHS, paths - start)
+        rng = np.random.default_rng(child)
+        value = np.zeros(size)
+        shock_sum = np.zeros(size)
+        step = np.empty(size)
+        if monthly > 0:
+            for _ in range(n):
+                rng.standard_normal(out=step)
+                shock_sum += step
+                step *= sigma_m
+                step += mean_m
+                np.exp(step, out=step)
+                value *= step
+                value += monthly
+        else:
+            shock_sum = rng.standard_normal(size) * np.sqrt(n)
+        if lumpsum > 0:
+            independent = rng.standard_normal(size) * np.sqrt(n)
+            value += lumpsum * np.exp(n * mean_l + a * shock_sum + b * independent)
+        corpus[start:start + size] = value
+
+    result = {
+        "paths": paths,
+        "months": n,
+        "invested": float(max(monthly, 0) * n + max(lumpsum, 0)),
+        "mean": float(corpus.mean()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(corpus, PERCENTILES))},
+    }
+    if target is not None:
+        result["target"] = float(target)
+        result["probability"] = float((corpus >= target).mean())
+    return result
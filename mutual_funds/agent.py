@@ -1,9 +1,6 @@
 from .toolkit import fetch_short_term_returns, fetch_risk_and_volatility_parameters, fetch_long_term_returns, fetch_fees_and_details
-from langchain.agents import initialize_agent, Tool, AgentType
-from dotenv import load_dotenv
-import os
-load_dotenv()
-from langchain_community.chat_models import ChatOpenAI
+from langchain.agents import Tool
+from llm_pool import get_agent_executor
 
 tools = [
     Tool(
@@ -20,7 +17,9 @@ tools = [
               "6_month_return": ...,
               "1_year_return": ...},
               ...
-            ]."""
+            ].
+            Only the top-ranked matching funds are returned, each with a composite "score" and its "category_percentile" among the matches.
+            "peer_ranks" gives each metric's exact rank within the whole category: {"rank", "peers", "percentile" (share of peers beaten)}."""
         ),
     ),
     Tool(
@@ -35,7 +34,9 @@ tools = [
               "5_year_return": ...,
               "10_year_return": ...]},
               ...
-            ]."""
+            ].
+            Only the top-ranked matching funds are returned, each with a composite "score" and its "category_percentile" among the matches.
+            "peer_ranks" gives each metric's exact rank within the whole category: {"rank", "peers", "percentile" (share of peers beaten)}."""
         )
     ),
     Tool(
@@ -54,7 +55,9 @@ tools = [
               "information_ratio": ...,
               "r_squared": ...},
               ...
-            ]."""
+            ].
+            Only the top-ranked matching funds are returned, each with a composite "score" and its "category_percentile" among the matches.
+            "peer_ranks" gives each metric's exact rank within the whole category: {"rank", "peers", "percentile" (share of peers beaten)}."""
         ),
     ),
     Tool(
@@ -71,18 +74,13 @@ tools = [
               "exit_load": ...,
               "fund_manager": ...},
               ...
-            ]."""
+            ].
+            Only the top-ranked matching funds are returned, each with a composite "score" and its "category_percentile" among the matches.
+            "peer_ranks" gives each metric's exact rank within the whole category: {"rank", "peers", "percentile" (share of peers beaten)}."""
         ),
     ),
 ]
 
 def get_mutual_funds_agent():
     """Lazy initialization of the Mutual Funds agent."""
-    print("🔧 Initializing Mutual Funds Agent...")
-    return initialize_agent(
-        tools=tools,
-        llm=ChatOpenAI(model="gpt-4o-mini", temperature=0.2, openai_api_key=os.getenv("OPENAI_API_KEY")),
-        agent=AgentType.OPENAI_FUNCTIONS,
-        handle_parsing_errors=True,
-        verbose=True
-    )
\ No newline at end of file
+    return get_agent_executor("Mutual Funds", tools, "gpt-4o-mini", temperature=0.2)
\ No newline at end of file
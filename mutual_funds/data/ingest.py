@@ -0,0 +1,213 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from db import mutual_funds_collection, etf_collection
+from peer_ranks import refresh_peer_ranks
+from orc_cache import bump_data_version
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from typing import Dict, List
+
+# Schema-driven ingestion of the Value Research style CSV exports. Every asset
+# class ships the same five files (snapshot, short-term returns, long-term
+# returns, risk, fees); SECTIONS says which CSV columns to keep and how to
+# clean them, ASSET_CLASSES only names the files. For one asset class the five
+# CSVs are read, each section's numeric columns are cleaned in one vectorised
+# pass, the sections are outer-joined on fund_name in memory and every fund
+# gets a single upsert into mutual_funds or etf_data (names containing "ETF").
+#
+#   python ingest.py [equity debt hybrid commodities]     (default: all)
+#
+# Column kinds:
+#   text     kept as is
+#   number   digits and "." only (expense ratio, AUM, minimum investment...)
+#   signed   digits, "." and "-" (returns and risk ratios that can go negative)
+#   date     parsed with pd.to_datetime
+# A blank or unparsable value is stored as "" (None for dates), as before.
+
+KEY_FIELD = "fund_name"
+ETF_MARKER = "ETF"
+
+SECTIONS: Dict[str, dict] = {
+    "snapshot": {
+        "columns": {
+            "Funds": ("fund_name", "text"),
+            "Riskometer": ("riskometer", "text"),
+            "Category": ("category", "text"),
+            "Expense Ratio (%)": ("expense_ratio", "number"),
+            "Launch": ("launch_date", "date"),
+            "Net Assets (Cr)": ("net_assets", "number"),
+        },
+        "required": ["launch_date"],
+    },
+    "short_term": {
+        "columns": {
+            "Funds": ("fund_name", "text"),
+            "1 Wk Ret (%)": ("1_week_return", "signed"),
+            "1 Mth Ret (%)": ("1_month_return", "signed"),
+            "3 Mth Ret (%)": ("3_month_return", "signed"),
+            "6 Mth Ret (%)": ("6_month_return", "signed"),
+            "1 Yr Ret (%)": ("1_year_return", "signed"),
+        },
+    },
+    "long_term": {
+        "columns": {
+            "Funds": ("fund_name", "text"),
+            "3 Yr Ret (%)": ("3_year_return", "signed"),
+            "5 Yr Ret (%)": ("5_year_return", "signed"),
+            "10 Yr Ret (%)": ("10_year_return", "signed"),
+        },
+    },
+    "risk": {
+        "columns": {
+            "Funds": ("fund_name", "text"),
+            "Standard Deviation": ("standard_deviation", "number"),
+            "Sharpe Ratio": ("sharpe_ratio", "signed"),
+            "Sortino Ratio": ("sortino_ratio", "signed"),
+            "Beta": ("beta", "signed"),
+            "Alpha": ("alpha", "signed"),
+            "Information Ratio": ("information_ratio", "signed"),
+            "R-Squared": ("r_squared", "number"),
+        },
+    },
+    "fees": {
+        "columns": {
+            "Funds": ("fund_name", "text"),
+            "Minimum Investment": ("minimum_investment", "number"),
+            "Exit Load (Period)": ("exit_load", "number"),
+            "Fund Manager (Tenure)": ("fund_manager", "text"),
+        },
+    },
+}
+
+# asset class -> directory, CSV per section, and optional extras:
+#   reset     empty both collections first (the equity load is the full refresh)
+#   required  extra per-section columns a row must have to be kept
+ASSET_CLASSES: Dict[str, dict] = {
+    "equity": {
+        "dir": "equity",
+        "files": {
+            "snapshot": "equity-snapshot.csv",
+            "short_term": "equity-short-term-return.csv",
+            "long_term": "equity-long-term-return.csv",
+            "risk": "equity-risk.csv",
+            "fees": "equity-fees.csv",
+        },
+        "reset": True,
+        "required": {"long_term": ["3_year_return"], "risk": ["standard_deviation"]},
+    },
+    **{
+        asset: {
+            "dir": asset,
+            "files": {
+                "snapshot": f"{asset}_snapshot.csv",
+                "short_term": f"{asset}_short_term.csv",
+                "long_term": f"{asset}_long_term.csv",
+                "risk": f"{asset}_risk.csv",
+                "fees": f"{asset}_fees_and_details.csv",
+            },
+        }
+        for asset in ("debt", "hybrid", "commodities")
+    },
+}
+
+PATTERNS = {"number": r"[^\d\.]", "signed": r"[^\d\.\-]"}
+
+def load_section(filepath: str, section: str, required: List[str] = ()) -> pd.DataFrame:
+    """One CSV -> cleaned frame indexed by fund_name, only rows with every required column."""
+    columns = SECTIONS[section]["columns"]
+    df = pd.read_csv(filepath, usecols=list(columns), encoding="utf-8-sig")
+    df = df.rename(columns={source: field for source, (field, _) in columns.items()})
+
+    for kind, pattern in PATTERNS.items():
+        fields = [field for field, k in columns.values() if k == kind]
+        if fields:
+            df[fields] = (
+                df[fields].astype(str)
+                .replace(pattern, "", regex=True)
+                .apply(pd.to_numeric, errors="coerce")
+            )
+    for field in (field for field, kind in columns.values() if kind == "date"):
+        df[field] = pd.to_datetime(df[field], errors="coerce")
+
+    needed = [KEY_FIELD, *SECTIONS[section].get("required", []), *required]
+    df = df.dropna(subset=needed)
+    # later rows used to overwrite earlier ones, so the last duplicate wins
+    return df.drop_duplicates(subset=KEY_FIELD, keep="last").set_index(KEY_FIELD)
+
+def load_asset_class(asset: str, base_dir: str = None) -> pd.DataFrame:
+    """All sections of one asset class joined on fund_name, with a present flag per section."""
+    config = ASSET_CLASSES[asset]
+    base_dir = base_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), config["dir"])
+    frames = []
+    for section, filename in config["files"].items():
+        df = load_section(os.path.join(base_dir, filename), section, config.get("required", {}).get(section, []))
+        df[f"_has_{section}"] = True
+        frames.append(df)
+    joined = pd.concat(frames, axis=1, join="outer")
+    for section in config["files"]:
+        joined[f"_has_{section}"] = joined[f"_has_{section}"].fillna(False).astype(bool)
+    print(f"📄 {asset}: {len(joined)} funds across {len(frames)} files")
+    return joined
+
+def fund_updates(joined: pd.DataFrame, sections: List[str]) -> List[UpdateOne]:
+    """One upsert per fund with the fields of every section it appeared in."""
+    blank = {}
+    for section in sections:
+        for field, kind in SECTIONS[section]["columns"].values():
+            if field != KEY_FIELD:
+                blank[field] = None if kind == "date" else ""
+    values = joined[list(blank)].astype(object)
+    for field, fill in blank.items():
+        values[field] = values[field].where(values[field].notna(), fill)
+
+    ops = []
+    present = joined[[f"_has_{section}" for section in sections]].to_numpy()
+    for fund_name, row, has in zip(values.index, values.to_dict(orient="records"), present):
+        update = {KEY_FIELD: fund_name}
+        for section, included in zip(sections, has):
+            if included:
+                update.update({
+                    field: row[field]
+                    for field, _ in SECTIONS[section]["columns"].values() if field != KEY_FIELD
+                })
+        ops.append(UpdateOne({KEY_FIELD: fund_name}, {"$set": update}, upsert=True))
+    return ops
+
+def push_funds(joined: pd.DataFrame, sections: List[str], collection: Collection) -> int:
+    ops = fund_updates(joined, sections)
+    if not ops:
+        print(f"No records to upsert into {collection.name}.")
+        return 0
+    result = collection.bulk_write(ops, ordered=False)
+    print(f"{collection.name}: Matched {result.matched_count}, "
+          f"Modified {result.modified_count}, "
+          f"Upserted {len(result.upserted_ids)} new docs.")
+    return len(ops)
+
+def ingest_asset_class(asset: str, base_dir: str = None) -> dict:
+    """Load, join and upsert one asset class; peer ranks are refreshed for its funds."""
+    config = ASSET_CLASSES[asset]
+    if config.get("reset"):
+        mutual_funds_collection.delete_many({})
+        etf_collection.delete_many({})
+
+    joined = load_asset_class(asset, base_dir)
+    sections = list(config["files"])
+    is_etf = joined.index.to_series().str.contains(ETF_MARKER, na=False).to_numpy()
+    counts = {
+        "mutual_funds": push_funds(joined[~is_etf], sections, mutual_funds_collection),
+        "etf_data": push_funds(joined[is_etf], sections, etf_collection),
+    }
+
+    # re-rank only the categories of the funds just pushed
+    refresh_peer_ranks(mutual_funds_collection, joined.index[~is_etf].tolist())
+    refresh_peer_ranks(etf_collection, joined.index[is_etf].tolist())
+    bump_data_version()
+    print(f"✅ {asset} data loaded: {counts}")
+    return counts
+
+if __name__ == "__main__":
+    for asset in sys.argv[1:] or list(ASSET_CLASSES):
+        ingest_asset_class(asset)
@@ -5,6 +5,7 @@ import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from db import mutual_funds_collection
+from fund_metrics import fund_view
 
 @tool("fetch_short_term_returns", return_direct=True)
 def fetch_short_term_returns(query_filter: str = "{}") -> str:
@@ -19,20 +20,7 @@ def fetch_short_term_returns(query_filter: str = "{}") -> str:
       "1_year_return": ...},
       ...
     ]."""
-    filter_dict = json.loads(query_filter) if query_filter != "{}" else {}
-    
-    cursor = mutual_funds_collection.find(filter_dict)
-
-    results = [
-        {"fund_name": doc["fund_name"],
-         "1_week_return": doc.get("1_week_return", None),
-         "1_month_return": doc.get("1_month_return", None),
-         "3_month_return": doc.get("3_month_return", None),
-         "6_month_return": doc.get("6_month_return", None),
-         "1_year_return": doc.get("1_year_return", None)}
-        for doc in cursor
-    ]
-    return json.dumps(results)
+    return json.dumps(fund_view(mutual_funds_collection, query_filter, "short_term"))
 
 @tool("fetch_long_term_returns", return_direct=True)
 def fetch_long_term_returns(query_filter: str = "{}") -> str:
@@ -45,18 +33,7 @@ def fetch_long_term_returns(query_filter: str = "{}") -> str:
       "10_year_return": ...]},
       ...
     ]."""
-    filter_dict = json.loads(query_filter) if query_filter != "{}" else {}
-    
-    cursor = mutual_funds_collection.find(filter_dict)
-
-    results = [
-        {"fund_name": doc["fund_name"],
-         "3_year_return": doc.get("3_year_return", None),
-         "5_year_return": doc.get("5_year_return", None),
-         "10_year_return": doc.get("10_year_return", None)}
-        for doc in cursor
-    ]
-    return json.dumps(results)
+    return json.dumps(fund_view(mutual_funds_collection, query_filter, "long_term"))
 
 @tool("fetch_risk_and_volatility_parameters", return_direct=True)
 def fetch_risk_and_volatility_parameters(query_filter: str = "{}") -> str:
@@ -73,22 +50,7 @@ def fetch_risk_and_volatility_parameters(query_filter: str = "{}") -> str:
       "r_squared": ...},
       ...
     ]."""
-    filter_dict = json.loads(query_filter) if query_filter != "{}" else {}
-    
-    cursor = mutual_funds_collection.find(filter_dict)
-
-    results = [
-        {"fund_name": doc["fund_name"],
-         "sharpe_ratio": doc.get("shrape_ratio", None),
-         "sortino_ratio": doc.get("sortino_ratio", None),
-         "beta": doc.get("beta", None),
-         "alpha": doc.get("alpha", None),
-         "standard_deviation": doc.get("standard_deviation", None),
-         "information_ratio": doc.get("information_ratio", None),
-         "r_squared": doc.get("r_squared", None)}
-        for doc in cursor
-    ]
-    return json.dumps(results)
+    return json.dumps(fund_view(mutual_funds_collection, query_filter, "risk"))
 
 @tool("fetch_fees_and_details", return_direct=True)
 def fetch_fees_and_details(query_filter: str = "{}") -> str:
@@ -103,20 +65,7 @@ def fetch_fees_and_details(query_filter: str = "{}") -> str:
       "fund_manager": ...},
       ...
     ]."""
-    filter_dict = json.loads(query_filter) if query_filter != "{}" else {}
-    
-    cursor = mutual_funds_collection.find(filter_dict)
-
-    results = [
-        {"fund_name": doc["fund_name"],
-         "category": doc.get("category", None),
-         "expense_ratio": doc.get("expense_ratio", None),
-         "minimum_investment": doc.get("minimum_investment"),
-         "exit_load": doc.get("exit_load", None),
-         "fund_manager": doc.get("fund_manager", None)}
-        for doc in cursor
-    ]
-    return json.dumps(results)
+    return json.dumps(fund_view(mutual_funds_collection, query_filter, "fees"))
 
 def fetch_all_categories() -> list:
     """Fetch all unique categories from the mutual funds collection."""
@@ -1,5 +1,5 @@
 import requests
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from datetime import datetime
 from pprint import pprint
 import sys
@@ -9,8 +9,18 @@ from dateutil.relativedelta import relativedelta
 # adjust import path as needed
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from db import mf_bkp_collection
+from nav_store import append_navs, daily_returns_arrays, write_nav
 
 API_URL_TEMPLATE = "https://api.mfapi.in/mf/{}"
+WRITE_BATCH_SIZE = 100
+
+# Incremental mode keeps a high-water mark on each scheme document:
+#   nav_hwm      last ingested date ("YYYY-MM-DD")
+#   nav_hwm_nav  NAV on that date (previous NAV for the next appended day)
+# Each run only parses the points newer than nav_hwm and $sets the new
+# "daily_returns.<date>" keys, so the 10+ year map is never rebuilt or re-sent.
+# The same new days are appended to the columnar nav_store, which is what the
+# metric jobs read.
 
 def fetch_nav_data(scheme_code):
     try:
@@ -22,7 +32,21 @@ def fetch_nav_data(scheme_code):
         print(f"❌ Error fetching NAV for {scheme_code}: {e}")
         return None
 
-def calculate_daily_returns(nav_list):
+def new_nav_points(nav_list, since=None):
+    """
+    Points of an mfapi history newer than `since` (datetime), parsed into
+    (datetime, nav) pairs. mfapi lists the newest day first, so parsing
+    stops at the first point on or before the high-water mark.
+    """
+    parsed = []
+    for item in nav_list:
+        dt = datetime.strptime(item['date'], '%d-%m-%Y')
+        if since is not None and dt <= since:
+            break
+        parsed.append((dt, float(item['nav'].replace(',', ''))))
+    return parsed
+
+def calculate_daily_returns(nav_list, since=None, prev_nav=None):
     """
     nav_list: list of dicts with keys 'date' (dd-mm-yyyy) and 'nav' (string)
     Returns a dict:
@@ -31,19 +55,15 @@ def calculate_daily_returns(nav_list):
         '2025-01-03': { 'nav': 1240.00, 'diff_in_nav': 5.44,    'diff_%': 0.4403 },
         ...
       }
+    With `since` (datetime) only days after it are returned, and `prev_nav`
+    (the NAV on `since`) seeds diff_in_nav / diff_% for the first of them.
     """
     # 1. Parse and sort
-    parsed = []
-    for item in nav_list:
-        # convert "dd-mm-yyyy" → datetime, nav → float
-        dt = datetime.strptime(item['date'], '%d-%m-%Y')
-        nav = float(item['nav'].replace(',', ''))
-        parsed.append((dt, nav))
+    parsed = new_nav_points(nav_list, since)
     parsed.sort(key=lambda x: x[0])
 
     # 2. Build the daily-returns dict
     daily_returns = {}
-    prev_nav = None
     for dt, nav in parsed:
         date_str = dt.strftime('%Y-%m-%d')
         if prev_nav is None:
@@ -61,6 +81,89 @@ def calculate_daily_returns(nav_list):
         prev_nav = nav
 
     return daily_returns
+
+def bootstrap_high_water_marks(collection=mf_bkp_collection):
+    """
+    Derive nav_hwm / nav_hwm_nav server-side for documents ingested before
+    incremental mode (daily_returns present, no nav_hwm), without pulling the
+    maps into Python.
+    """
+    pipeline = [
+        {"$match": {"nav_hwm": {"$exists": False}, "daily_returns": {"$type": "object"}}},
+        # one pass over the map keeps the entry with the greatest date key, so
+        # the NAV comes back with the mark instead of a find_one per scheme
+        {"$project": {"last": {"$reduce": {
+            "input": {"$objectToArray": "$daily_returns"},
+            "initialValue": {"k": None, "v": None},
+            "in": {"$cond": [{"$gt": ["$$this.k", "$$value.k"]}, "$$this", "$$value"]},
+        }}}},
+        {"$project": {"hwm": "$last.k", "nav": "$last.v.nav"}},
+        {"$match": {"hwm": {"$ne": None}}},
+    ]
+    ops = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"nav_hwm": doc["hwm"], "nav_hwm_nav": doc.get("nav")}})
+        for doc in collection.aggregate(pipeline)
+    ]
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    print(f"🔖 Bootstrapped high-water marks for {len(ops)} schemes")
+    return len(ops)
+
+def incremental_update(fund, api_data):
+    """
+    (UpdateOne appending the days after the scheme's high-water mark, the new
+    daily_returns entries); (None, {}) when mfapi has nothing new.
+    """
+    hwm = fund.get("nav_hwm")
+    since = datetime.strptime(hwm, "%Y-%m-%d") if hwm else None
+    new_days = calculate_daily_returns(api_data["data"], since=since, prev_nav=fund.get("nav_hwm_nav") if hwm else None)
+    if not new_days:
+        return None, {}
+
+    last_date = max(new_days)
+    update = {f"daily_returns.{date_str}": values for date_str, values in new_days.items()}
+    update.update({
+        "fund_house":      api_data.get("meta", {}).get("fund_house"),
+        "scheme_type":     api_data.get("meta", {}).get("scheme_type"),
+        "scheme_category": api_data.get("meta", {}).get("scheme_category"),
+        "nav_hwm":         last_date,
+        "nav_hwm_nav":     new_days[last_date]["nav"],
+        "last_updated":    datetime.now(),
+    })
+    return UpdateOne({"schemeCode": fund["schemeCode"]}, {"$set": update}, upsert=True), new_days
+
+def main_incremental(limit=None):
+    bootstrap_high_water_marks()
+    cursor = mf_bkp_collection.find({}, {"schemeCode": 1, "schemeName": 1, "nav_hwm": 1, "nav_hwm_nav": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+
+    ops, navs, appended = [], {}, 0
+    for fund in cursor:
+        scheme_code = fund.get("schemeCode")
+        if not scheme_code:
+            continue
+
+        api_data = fetch_nav_data(scheme_code)
+        if not api_data or "data" not in api_data:
+            continue
+
+        op, new_days = incremental_update(fund, api_data)
+        if op is None:
+            continue
+        appended += len(new_days)
+        print(f"📈 {scheme_code}: {len(new_days)} new days after {fund.get('nav_hwm')}")
+        ops.append(op)
+        navs[scheme_code] = daily_returns_arrays(new_days)
+        if len(ops) >= WRITE_BATCH_SIZE:
+            mf_bkp_collection.bulk_write(ops, ordered=False)
+            append_navs(navs)
+            ops, navs = [], {}
+    if ops:
+        mf_bkp_collection.bulk_write(ops, ordered=False)
+        append_navs(navs)
+    print(f"✅ Appended {appended} daily returns.\n")
+
 import pandas as pd
 
 
@@ -88,11 +191,18 @@ def main():
                 "scheme_type":     api_data.get("meta", {}).get("scheme_type"),
                 "scheme_category": api_data.get("meta", {}).get("scheme_category"),
                 "daily_returns":   daily_returns,
+                "nav_hwm":         max(daily_returns) if daily_returns else None,
+                "nav_hwm_nav":     daily_returns[max(daily_returns)]["nav"] if daily_returns else None,
                 "last_updated":    datetime.now()
             }},
             upsert=True
         )
+        write_nav(scheme_code, *daily_returns_arrays(daily_returns))
         print(f"✅ Stored {len(daily_returns)} daily returns for {scheme_code}.\n")
 
 if __name__ == "__main__":
-    main()
+    # --full rebuilds the whole map (first load / backfill); default is incremental
+    if "--full" in sys.argv:
+        main()
+    else:
+        main_incremental()
@@ -0,0 +1,137 @@
+from pymongo import UpdateOne
+from datetime import datetime
+import pandas as pd
+import numpy as np
+import json
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from db import mutual_funds_collection
+from orc_cache import bump_data_version
+
+# Risk, return and composite fund scores from a single projected scan. The
+# fields every score needs are loaded once into a columnar frame, each score
+# is computed over whole columns, and all of them are written back in one
+# unordered bulk_write keyed by _id:
+#
+#   risk_score     0-6, number of risk flags raised (lower is safer)
+#   return_score   -100..100, excess return over category scaled per horizon,
+#                  averaged over all HORIZONS (a missing horizon counts as 0)
+#   <variant>      weighted sum of the normalised components, one per SCORE_VARIANTS entry
+#
+# New variants are config, not another scan: set FUND_SCORE_VARIANTS to JSON
+# such as {"conservative_score": {"risk": -0.8, "return": 0.2}}.
+#
+#   python fund_scorer.py
+
+HORIZONS = ["1y", "3y", "5y"]
+MAX_DRAWDOWN_LIMIT = -0.20
+BETA_LIMIT = 1.10
+
+# variant -> {component: weight}; components are "risk" (risk_score / 6, 0..1)
+# and "return" (return_score / 100, -1..1)
+SCORE_COMPONENTS = ("risk", "return")
+SCORE_VARIANTS = json.loads(os.getenv("FUND_SCORE_VARIANTS", "null")) or {
+    "composite_score": {"return": 0.6, "risk": -0.4},
+}
+
+def validate_variants(variants: dict) -> dict:
+    """Fail fast on a variant weighting a component that does not exist."""
+    for name, weights in variants.items():
+        unknown = set(weights) - set(SCORE_COMPONENTS)
+        if unknown:
+            raise ValueError(f"Score variant {name!r} uses unknown components {sorted(unknown)}; expected {list(SCORE_COMPONENTS)}")
+    return variants
+
+validate_variants(SCORE_VARIANTS)
+
+PROJECTION = {
+    "metrics.sharpe_ratio": 1,
+    "metrics.alpha": 1,
+    "metrics.standard_deviation": 1,
+    "metrics.maximum_drawdown": 1,
+    "metrics.beta": 1,
+    "metrics.expense_ratio": 1,
+    **{f"returns.{h}": 1 for h in HORIZONS},
+}
+
+def load_frame(collection=mutual_funds_collection) -> pd.DataFrame:
+    """Every scored field of every fund as numeric columns (NaN when missing)."""
+    frame = pd.json_normalize(list(collection.find({}, PROJECTION)))
+    columns = [
+        "metrics.sharpe_ratio.investment", "metrics.sharpe_ratio.category",
+        "metrics.alpha.investment",
+        "metrics.standard_deviation.investment", "metrics.standard_deviation.category",
+        "metrics.maximum_drawdown", "metrics.beta", "metrics.expense_ratio",
+        *[f"returns.{h}.{side}" for h in HORIZONS for side in ("investment", "category")],
+    ]
+    frame = frame.reindex(columns=["_id", *columns])
+    frame[columns] = frame[columns].apply(pd.to_numeric, errors="coerce")
+    return frame
+
+def risk_scores(frame: pd.DataFrame) -> pd.Series:
+    """One point per risk flag; a missing metric raises no flag."""
+    expense = frame["metrics.expense_ratio"]
+    flags = [
+        frame["metrics.sharpe_ratio.investment"] <= frame["metrics.sharpe_ratio.category"],
+        frame["metrics.alpha.investment"] <= 0,
+        frame["metrics.standard_deviation.investment"] >= frame["metrics.standard_deviation.category"],
+        frame["metrics.maximum_drawdown"] < MAX_DRAWDOWN_LIMIT,
+        frame["metrics.beta"] > BETA_LIMIT,
+        expense > expense.median(),
+    ]
+    return sum(flag.astype(int) for flag in flags)
+
+def return_scores(frame: pd.DataFrame) -> pd.Series:
+    """
+    Per horizon, excess over category scaled to 0..100 against the best fund
+    (positive) or -100..0 against the worst (negative); summed and divided by
+    len(HORIZONS) like the old return evaluator, so a missing horizon counts
+    as 0. NaN only when no horizon has data.
+    """
+    scores = []
+    for h in HORIZONS:
+        diff = frame[f"returns.{h}.investment"] - frame[f"returns.{h}.category"]
+        max_pos = diff[diff >= 0].max()
+        max_pos = max_pos if max_pos and not np.isnan(max_pos) else 1.0
+        min_neg = diff[diff < 0].min()
+        min_neg = 0.0 if np.isnan(min_neg) else min_neg
+        negative = diff / min_neg * -100 if min_neg != 0 else 0.0
+        scores.append(np.where(diff >= 0, diff / max_pos * 100, np.where(diff < 0, negative, np.nan)))
+    scores = np.vstack(scores)
+    counts = (~np.isnan(scores)).sum(axis=0)
+    overall = np.where(counts > 0, np.nansum(scores, axis=0) / len(HORIZONS), np.nan)
+    return pd.Series(overall, index=frame.index)
+
+def score_frame(frame: pd.DataFrame, variants: dict = None) -> pd.DataFrame:
+    """risk_score, return_score and every variant column for each fund."""
+    variants = validate_variants(variants or SCORE_VARIANTS)
+    scores = pd.DataFrame({"risk_score": risk_scores(frame), "return_score": return_scores(frame)}, index=frame.index)
+    components = {"risk": scores["risk_score"] / 6, "return": scores["return_score"].fillna(0) / 100}
+    for name, weights in variants.items():
+        scores[name] = sum(weight * components[component] for component, weight in weights.items())
+    return scores
+
+def push_scores(collection=mutual_funds_collection, variants: dict = None):
+    frame = load_frame(collection)
+    if frame.empty:
+        print("No funds to score.")
+        return None
+    scores = score_frame(frame, variants)
+    now = datetime.now()
+    ops = [
+        UpdateOne({"_id": _id}, {"$set": {
+            **{k: (None if pd.isna(v) else (int(v) if k == "risk_score" else float(v))) for k, v in row.items()},
+            "scores_updated": now,
+        }})
+        for _id, row in zip(frame["_id"], scores.to_dict(orient="records"))
+    ]
+    result = collection.bulk_write(ops, ordered=False)
+    bump_data_version()
+    print(f"Matched:  {result.matched_count}")
+    print(f"Modified: {result.modified_count}")
+    return result
+
+if __name__ == "__main__":
+    push_scores()
+    print("Fund scores updated successfully.")
@@ -6,6 +6,7 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from db import index_collection
+from nav_store import write_nav, to_days
 
 def fetch_index_data(symbol: str, start: str, end: str) -> pd.DataFrame:
     """Download OHLCV index data and calculate both absolute and percentage daily returns."""
@@ -51,6 +52,7 @@ def push_to_mongo(df: pd.DataFrame, index_symbol: str, collection):
     }
 
     result = collection.update_one(filter_doc, update_doc, upsert=True)
+    write_nav(index_symbol, to_days(df['Date'].tolist()), df['Close'].to_numpy())
     if result.upserted_id:
         verb = "Inserted"
     else:
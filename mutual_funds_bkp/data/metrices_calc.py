@@ -1,31 +1,25 @@
+import numpy as np
 import pandas as pd
-from pymongo import MongoClient
 from datetime import datetime, timedelta
 import sys
 import os
 
 # --- Adjust import path ---
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from db import mf_bkp_collection, index_collection
+from nav_store import load_nav, to_datetime64
 
 
-def get_filtered_returns_series(collection, key_field, key_value, return_field, date_limit):
-    doc = collection.find_one({ key_field: key_value }, {"daily_returns": 1 })
-    if not doc or "daily_returns" not in doc:
-        raise ValueError(f"No daily_returns found for {key_field}={key_value}")
+def get_filtered_returns_series(series, date_limit):
+    """
+    Daily % returns of a nav_store series (scheme code or index symbol) from
+    date_limit on, indexed by date. Built straight from the stored arrays.
+    """
+    days, nav = load_nav(series, since=date_limit)
+    if len(nav) < 2:
+        raise ValueError(f"No NAV history found for {series}")
 
-    returns_map = {}
-    for date_str, data in doc["daily_returns"].items():
-        if return_field not in data or data[return_field] is None:
-            continue
-        try:
-            dt = datetime.strptime(date_str, "%Y-%m-%d")
-            if dt >= date_limit:
-                returns_map[dt] = float(data[return_field])
-        except Exception as e:
-            continue  # skip malformed dates
-
-    return pd.Series(returns_map).sort_index()
+    returns = np.diff(nav) / nav[:-1] * 100
+    return pd.Series(returns, index=pd.DatetimeIndex(to_datetime64(days[1:])))
 
 
 def calculate_beta(fund_series: pd.Series, index_series: pd.Series) -> float:
@@ -47,15 +41,8 @@ if __name__ == "__main__":
         three_years_ago = datetime.today() - timedelta(days=3*365)
 
         # --- Get fund and index series ---
-        fund_series = get_filtered_returns_series(
-            mf_bkp_collection, key_field="schemeCode", key_value=100033,
-            return_field="diff_%", date_limit=three_years_ago
-        )
-
-        index_series = get_filtered_returns_series(
-            index_collection, key_field="symbol", key_value="^NSEI",
-            return_field="percent_return", date_limit=three_years_ago
-        )
+        fund_series = get_filtered_returns_series(100033, three_years_ago)
+        index_series = get_filtered_returns_series("^NSEI", three_years_ago)
 
         # --- Calculate beta ---
         beta_value = calculate_beta(fund_series, index_series)
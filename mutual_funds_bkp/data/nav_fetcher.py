@@ -0,0 +1,176 @@
+from pymongo.errors import PyMongoError
+from datetime import date
+import aiohttp
+import asyncio
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from db import mf_bkp_collection
+from daily_return import incremental_update, bootstrap_high_water_marks
+from nav_store import append_navs, daily_returns_arrays
+
+# Concurrent NAV refresh for every scheme api_fetcher.py loaded:
+#
+#   fetchers (aiohttp, NAV_FETCH_CONCURRENCY per host) --bounded queue--> writer
+#
+# Fetchers retry timeouts, 429s and 5xx with jittered exponential backoff.
+# The writer turns each response into daily_return.incremental_update()
+# (only days after the scheme's high-water mark) and flushes them with
+# unordered bulk writes, mirroring the new days into nav_store. Scheme codes
+# are appended to the checkpoint file only after their batch is written, so an
+# interrupted run resumes where it left off and a finished run removes the
+# file. The checkpoint is dated: a run on a later day starts over, so schemes
+# that keep failing cannot pin it forever.
+#
+#   python nav_fetcher.py [--fresh]      (--fresh ignores an existing checkpoint)
+
+API_BASE_URL = os.getenv("MFAPI_BASE_URL", "https://api.mfapi.in")
+NAV_FETCH_CONCURRENCY = int(os.getenv("NAV_FETCH_CONCURRENCY", "16"))
+NAV_FETCH_RETRIES = int(os.getenv("NAV_FETCH_RETRIES", "4"))
+NAV_FETCH_BACKOFF_SECONDS = float(os.getenv("NAV_FETCH_BACKOFF_SECONDS", "0.5"))
+NAV_FETCH_TIMEOUT_SECONDS = float(os.getenv("NAV_FETCH_TIMEOUT_SECONDS", "30"))
+NAV_QUEUE_SIZE = int(os.getenv("NAV_QUEUE_SIZE", "256"))
+NAV_WRITE_BATCH_SIZE = int(os.getenv("NAV_WRITE_BATCH_SIZE", "200"))
+CHECKPOINT_PATH = os.getenv("NAV_CHECKPOINT_PATH", os.path.join(os.path.dirname(__file__), "nav_fetch.checkpoint"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class Checkpoint:
+    """Append-only file of scheme codes whose update has been written on `run_date`."""
+
+    def __init__(self, path: str, fresh: bool = False, run_date: str = None):
+        self.path = path
+        header = f"# {run_date or date.today().isoformat()}"
+        self.done = set()
+        if not fresh and os.path.exists(path):
+            with open(path) as f:
+                lines = [line.strip() for line in f if line.strip()]
+            if lines and lines[0] == header:
+                self.done = set(lines[1:])
+        if not self.done:
+            # missing, --fresh or left over from an earlier day
+            with open(path, "w") as f:
+                f.write(f"{header}\n")
+
+    def mark(self, scheme_codes):
+        with open(self.path, "a") as f:
+            f.writelines(f"{code}\n" for code in scheme_codes)
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(str(code) for code in scheme_codes)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def fetch_nav_data(session: aiohttp.ClientSession, scheme_code, base_url: str = API_BASE_URL):
+    """mfapi JSON for one scheme, retrying transient failures; None once retries run out."""
+    url = f"{base_url}/mf/{scheme_code}"
+    for attempt in range(1, NAV_FETCH_RETRIES + 1):
+        try:
+            async with session.get(url) as res:
+                if res.status not in RETRY_STATUSES:
+                    res.raise_for_status()
+                    return await res.json(content_type=None)
+                error = f"HTTP {res.status}"
+        except aiohttp.ClientResponseError as e:
+            print(f"❌ Error fetching NAV for {scheme_code}: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            # ValueError: a 200 with a body that is not JSON (maintenance page, truncated response)
+            error = repr(e)
+        if attempt < NAV_FETCH_RETRIES:
+            await asyncio.sleep(random.uniform(0, NAV_FETCH_BACKOFF_SECONDS * 2 ** attempt))
+    print(f"❌ Giving up on NAV for {scheme_code} after {NAV_FETCH_RETRIES} attempts: {error}")
+    return None
+
+async def _fetcher(session, schemes: asyncio.Queue, results: asyncio.Queue, base_url: str):
+    while True:
+        fund = await schemes.get()
+        if fund is None:
+            return
+        await results.put((fund, await fetch_nav_data(session, fund["schemeCode"], base_url)))
+
+def _flush(collection, ops: list, navs: dict, codes: list, checkpoint: Checkpoint) -> int:
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+        append_navs(navs)
+    checkpoint.mark(codes)
+    return len(ops)
+
+async def _writer(results: asyncio.Queue, collection, checkpoint: Checkpoint, stats: dict):
+    ops, navs, codes = [], {}, []
+    while True:
+        item = await results.get()
+        if item is not None:
+            fund, api_data = item
+            if not api_data or "data" not in api_data:
+                stats["failed"] += 1
+            else:
+                op, new_days = incremental_update(fund, api_data)
+                if op is not None:
+                    ops.append(op)
+                    navs[fund["schemeCode"]] = daily_returns_arrays(new_days)
+                    stats["days"] += len(new_days)
+                # only successful fetches are checkpointed; failures are retried on resume
+                codes.append(fund["schemeCode"])
+        if codes and (item is None or len(codes) >= NAV_WRITE_BATCH_SIZE):
+            stats["written"] += await asyncio.to_thread(_flush, collection, ops, navs, codes, checkpoint)
+            ops, navs, codes = [], {}, []
+        if item is None:
+            return
+
+async def refresh_navs(collection=mf_bkp_collection, base_url: str = API_BASE_URL,
+                       checkpoint_path: str = CHECKPOINT_PATH, fresh: bool = False, limit: int = None) -> dict:
+    """Fetch and append new NAV days for every scheme; returns run counters."""
+    started = time.time()
+    checkpoint = Checkpoint(checkpoint_path, fresh)
+    bootstrap_high_water_marks(collection)
+
+    cursor = collection.find({"schemeCode": {"$exists": True}}, {"schemeCode": 1, "nav_hwm": 1, "nav_hwm_nav": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+    funds = [fund for fund in cursor if str(fund["schemeCode"]) not in checkpoint.done]
+    print(f"📡 Fetching NAVs for {len(funds)} schemes ({len(checkpoint.done)} already done)")
+
+    stats = {"schemes": len(funds), "failed": 0, "written": 0, "days": 0}
+    schemes = asyncio.Queue()
+    results = asyncio.Queue(maxsize=NAV_QUEUE_SIZE)
+    for fund in funds:
+        schemes.put_nowait(fund)
+    for _ in range(NAV_FETCH_CONCURRENCY):
+        schemes.put_nowait(None)
+
+    connector = aiohttp.TCPConnector(limit=NAV_FETCH_CONCURRENCY, limit_per_host=NAV_FETCH_CONCURRENCY, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=NAV_FETCH_TIMEOUT_SECONDS)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def fetch_all():
+            await asyncio.gather(*[_fetcher(session, schemes, results, base_url) for _ in range(NAV_FETCH_CONCURRENCY)])
+            await results.put(None)
+
+        fetchers = asyncio.create_task(fetch_all())
+        writer = asyncio.create_task(_writer(results, collection, checkpoint, stats))
+        # a failure on either side must not leave the other blocked on the queue
+        await asyncio.wait({fetchers, writer}, return_when=asyncio.FIRST_EXCEPTION)
+        failed = [task for task in (writer, fetchers) if task.done() and task.exception()]
+        if failed:
+            fetchers.cancel()
+            writer.cancel()
+            await asyncio.gather(fetchers, writer, return_exceptions=True)
+            raise failed[0].exception()
+        await writer
+
+    if stats["failed"] == 0:
+        checkpoint.clear()
+    stats["seconds"] = round(time.time() - started, 1)
+    print(f"✅ NAV refresh: {stats}")
+    return stats
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(refresh_navs(fresh="--fresh" in sys.argv))
+    except PyMongoError as e:
+        print(f"❌ MongoDB Error: {e}")
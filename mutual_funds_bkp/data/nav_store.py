@@ -0,0 +1,177 @@
+from pymongo import UpdateOne
+from bson.binary import Binary
+from datetime import date, datetime
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from db import nav_history_collection, mf_bkp_collection, index_collection
+
+# Columnar NAV store. Each series (a scheme code, or an index symbol such as
+# "^NSEI") is kept as one document per calendar year:
+#
+#   { series: "100033", year: 2024, count: 247, first_day: 19724, last_day: 20088,
+#     days: <int32 days since 1970-01-01, little endian>,
+#     nav:  <float64, little endian> }
+#
+# Readers get NumPy arrays straight from the buffers (np.frombuffer), so no
+# per-row date parsing happens after ingestion. A daily append only rewrites
+# the current year's bucket, which stays small.
+
+DAY_DTYPE = np.dtype("<i4")
+NAV_DTYPE = np.dtype("<f8")
+EPOCH = np.datetime64("1970-01-01", "D")
+
+def to_day(value) -> int:
+    """Days since 1970-01-01 for a date, datetime or 'YYYY-MM-DD' string."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        value = value.isoformat()
+    return int((np.datetime64(value, "D") - EPOCH).astype(int))
+
+def to_days(values) -> np.ndarray:
+    """Vectorised to_day for a sequence of 'YYYY-MM-DD' strings or datetime64 values."""
+    return (np.asarray(values, dtype="datetime64[D]") - EPOCH).astype(DAY_DTYPE)
+
+def to_datetime64(days: np.ndarray) -> np.ndarray:
+    """int32 day numbers -> datetime64[D], e.g. for a pandas index."""
+    return EPOCH + days.astype("timedelta64[D]")
+
+def _years(days: np.ndarray) -> np.ndarray:
+    return to_datetime64(days).astype("datetime64[Y]").astype(int) + 1970
+
+def _decode(doc):
+    return np.frombuffer(doc["days"], dtype=DAY_DTYPE), np.frombuffer(doc["nav"], dtype=NAV_DTYPE)
+
+def _bucket_op(series: str, year: int, days: np.ndarray, nav: np.ndarray) -> UpdateOne:
+    return UpdateOne({"series": series, "year": int(year)}, {"$set": {
+        "count": int(len(days)),
+        "first_day": int(days[0]),
+        "last_day": int(days[-1]),
+        "days": Binary(days.astype(DAY_DTYPE).tobytes()),
+        "nav": Binary(nav.astype(NAV_DTYPE).tobytes()),
+    }}, upsert=True)
+
+def _normalise(days, nav):
+    """Sorted, de-duplicated (last value wins) arrays with NaN NAVs dropped."""
+    days = np.asarray(days, dtype=DAY_DTYPE)
+    nav = np.asarray(nav, dtype=NAV_DTYPE)
+    keep = ~np.isnan(nav)
+    days, nav = days[keep], nav[keep]
+    # reverse so np.unique's first occurrence is the last value given for a day
+    uniq, idx = np.unique(days[::-1], return_index=True)
+    return uniq, nav[::-1][idx]
+
+def bucket_ops(series, days, nav) -> list:
+    """UpdateOnes replacing the year buckets covered by (days, nav)."""
+    days, nav = _normalise(days, nav)
+    if not len(days):
+        return []
+    years = _years(days)
+    bounds = np.flatnonzero(np.diff(years)) + 1
+    return [
+        _bucket_op(str(series), y[0], d, n)
+        for y, d, n in zip(np.split(years, bounds), np.split(days, bounds), np.split(nav, bounds))
+    ]
+
+def write_nav(series, days, nav, collection=nav_history_collection) -> int:
+    """Replace the stored history of one series for the years it covers."""
+    ops = bucket_ops(series, days, nav)
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+def append_navs(updates: dict, collection=nav_history_collection) -> int:
+    """
+    Merge new points into existing buckets for many series at once.
+    updates: {series: (days, nav)}. One read of the touched buckets, one bulk write.
+    """
+    touched = []
+    for series, (days, nav) in updates.items():
+        if len(days):
+            touched += [{"series": str(series), "year": int(y)} for y in np.unique(_years(np.asarray(days, dtype=DAY_DTYPE)))]
+    if not touched:
+        return 0
+    existing = {
+        (doc["series"], doc["year"]): _decode(doc)
+        for doc in collection.find({"$or": touched}, {"series": 1, "year": 1, "days": 1, "nav": 1})
+    }
+
+    ops = []
+    for series, (days, nav) in updates.items():
+        series = str(series)
+        old = [existing[key] for key in existing if key[0] == series]
+        all_days = np.concatenate([d for d, _ in old] + [np.asarray(days, dtype=DAY_DTYPE)])
+        all_nav = np.concatenate([n for _, n in old] + [np.asarray(nav, dtype=NAV_DTYPE)])
+        ops += bucket_ops(series, all_days, all_nav)
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+def daily_returns_arrays(daily_returns: dict):
+    """(days, nav) from a legacy {"YYYY-MM-DD": {"nav"|"close": ...}} map."""
+    dates, navs = [], []
+    for date_str, info in daily_returns.items():
+        raw = info.get("nav", info.get("close")) if isinstance(info, dict) else None
+        if raw is None:
+            continue
+        dates.append(date_str)
+        navs.append(raw)
+    if not dates:
+        return np.empty(0, DAY_DTYPE), np.empty(0, NAV_DTYPE)
+    return to_days(dates), np.array(navs, dtype=NAV_DTYPE)
+
+def load_nav(series, since=None, until=None, collection=nav_history_collection):
+    """
+    (days int32, nav float64) for one series, sorted by day, optionally limited
+    to since <= day <= until (date, datetime, 'YYYY-MM-DD' or day number).
+    """
+    return load_navs([series], since, until, collection).get(str(series), (np.empty(0, DAY_DTYPE), np.empty(0, NAV_DTYPE)))
+
+def load_navs(series_list, since=None, until=None, collection=nav_history_collection) -> dict:
+    """{series: (days, nav)} for many series in one query."""
+    lo = since if since is None or isinstance(since, (int, np.integer)) else to_day(since)
+    hi = until if until is None or isinstance(until, (int, np.integer)) else to_day(until)
+    query = {"series": {"$in": [str(s) for s in series_list]}}
+    if lo is not None:
+        query["last_day"] = {"$gte": int(lo)}
+    if hi is not None:
+        query["first_day"] = {"$lte": int(hi)}
+
+    parts = {}
+    for doc in collection.find(query, {"series": 1, "year": 1, "days": 1, "nav": 1}).sort([("series", 1), ("year", 1)]):
+        parts.setdefault(doc["series"], []).append(_decode(doc))
+
+    out = {}
+    for series, chunks in parts.items():
+        days = np.concatenate([d for d, _ in chunks])
+        nav = np.concatenate([n for _, n in chunks])
+        start = 0 if lo is None else np.searchsorted(days, lo, side="left")
+        end = len(days) if hi is None else np.searchsorted(days, hi, side="right")
+        out[series] = (days[start:end], nav[start:end])
+    return out
+
+def migrate(source, key_field: str, batch_size: int = 200, collection=nav_history_collection) -> int:
+    """
+    One-time backfill of the store from the nested daily_returns maps of
+    `source` (mutual_funds_bkp keyed by schemeCode, index_data by symbol).
+    """
+    ops, migrated = [], 0
+    for doc in source.find({"daily_returns": {"$type": "object"}}, {key_field: 1, "daily_returns": 1}):
+        if doc.get(key_field) is None:
+            continue
+        ops += bucket_ops(doc[key_field], *daily_returns_arrays(doc["daily_returns"]))
+        migrated += 1
+        if len(ops) >= batch_size:
+            collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    print(f"📦 Migrated {migrated} {source.name} histories into {collection.name}")
+    return migrated
+
+if __name__ == "__main__":
+    migrate(mf_bkp_collection, "schemeCode")
+    migrate(index_collection, "symbol")
@@ -1,150 +1,173 @@
-import requests
-from pymongo import MongoClient
+from pymongo import UpdateOne
 from datetime import datetime
-from pprint import pprint
+import numpy as np
+import time
 import sys
 import os
-from dateutil.relativedelta import relativedelta
-import pandas as pd
 
 # adjust import path as needed
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from db import mf_bkp_collection
+from nav_store import load_navs, EPOCH
+
+# Trailing and rolling returns for every scheme from nav_store arrays. A chunk
+# of schemes is concatenated into one sorted key array (scheme index * KEY_SPAN
+# + day), so "last NAV on or before the target date" for every scheme and
+# horizon is a single np.searchsorted. Results go back to mutual_funds_bkp via
+# unordered bulk writes keyed by schemeCode:
+#
+#   trailing_returns     {"1W", "1M", "3M", "6M", "1Y", "3Y", "5Y", "10Y"}  absolute %
+#   annualised_returns   {"1Y", "3Y", "5Y", "10Y"}                          CAGR %
+#   rolling_returns      {"3Y": {mean, median, min, max, std, positive_pct, count}}
+#   3Y_return, 5Y_return                                                    CAGR % (as before)
+#
+#   python return_adder.py
+
+# horizon -> months back (1W is handled in days)
+HORIZONS = {"1W": None, "1M": 1, "3M": 3, "6M": 6, "1Y": 12, "3Y": 36, "5Y": 60, "10Y": 120}
+ANNUALISED = {"1Y": 1, "3Y": 3, "5Y": 5, "10Y": 10}
+ROLLING_YEARS = [3]
+RETURN_CHUNK_SIZE = int(os.getenv("RETURN_CHUNK_SIZE", "2000"))
+RETURN_WRITE_BATCH_SIZE = int(os.getenv("RETURN_WRITE_BATCH_SIZE", "1000"))
+# no NAV history spans this many days, so scheme index * KEY_SPAN + day never collides
+KEY_SPAN = 1 << 20
+
+def shift_months(days: np.ndarray, months: int) -> np.ndarray:
+    """Same calendar day `months` earlier, clamped to month end (like relativedelta)."""
+    dates = EPOCH + np.asarray(days).astype("timedelta64[D]")
+    month = dates.astype("datetime64[M]")
+    day_of_month = (dates - month.astype("datetime64[D]")).astype(int)
+    target = month - months
+    month_len = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype(int)
+    shifted = target.astype("datetime64[D]") + np.minimum(day_of_month, month_len - 1)
+    return (shifted - EPOCH).astype(np.int64)
+
+class NavPanel:
+    """A chunk of non-empty NAV histories flattened into one searchable key array."""
+
+    def __init__(self, navs: dict):
+        self.series = [s for s in navs if len(navs[s][0])]
+        lengths = np.array([len(navs[s][0]) for s in self.series], dtype=np.int64)
+        self.end = np.cumsum(lengths)
+        self.start = self.end - lengths
+        self.owner = np.repeat(np.arange(len(self.series), dtype=np.int64), lengths)
+        self.days = np.concatenate([navs[s][0] for s in self.series]).astype(np.int64)
+        self.nav = np.concatenate([navs[s][1] for s in self.series])
+        self.keys = self.owner * KEY_SPAN + self.days
+
+    def nav_on_or_before(self, owner: np.ndarray, day: np.ndarray) -> np.ndarray:
+        """NAV of scheme `owner` on the last day <= `day`; NaN when before its history."""
+        pos = np.searchsorted(self.keys, owner * KEY_SPAN + day, side="right") - 1
+        valid = pos >= self.start[owner]
+        return np.where(valid, self.nav[np.maximum(pos, 0)], np.nan)
+
+def trailing_returns(panel: NavPanel) -> dict:
+    """{horizon: array(schemes)} of absolute % returns up to each scheme's latest NAV."""
+    latest_day = panel.days[panel.end - 1]
+    latest_nav = panel.nav[panel.end - 1]
+    owner = np.arange(len(panel.series), dtype=np.int64)
 
-def compute_annualised_returns(daily_returns_map):
-    """
-    Given daily_returns: { "YYYY-MM-DD": { "close": float, ... }, ... }
-    Returns a dict:
-      {
-        "3Y_Annualised": float|None,   # in %
-        "5Y_Annualised": float|None    # in %
-      }
-    """
-    # 1) build (date,nav) list
-    records = []
-    for date_str, info in daily_returns_map.items():
-        raw = info.get("nav", info.get("close"))
-        if raw is None:
-            continue
-        try:
-            nav = float(raw)
-            dt  = datetime.strptime(date_str, "%Y-%m-%d")
-        except Exception:
-            continue
-        records.append((dt, nav))
-
-    if not records:
-        return {"3Y_Annualised": None, "5Y_Annualised": None}
-
-    # 2) series of NAVs, sorted
-    nav_s = (
-        pd.Series(
-            [nav for _, nav in records],
-            index=pd.to_datetime([dt for dt, _ in records])
-        )
-        .sort_index()
-    )
-
-    latest_date = nav_s.index.max()
-    latest_nav  = nav_s.loc[latest_date]
-
-    # 3) compute annualised for 3Y and 5Y
     out = {}
-    for years in (3, 5):
-        label = f"{years}Y_Annualised"
-        target = latest_date - relativedelta(years=years)
-        past = nav_s[nav_s.index <= target]
-        if past.empty:
-            out[label] = None
-        else:
-            past_nav = past.iloc[-1]
-            ann = (latest_nav / past_nav)**(1/years) - 1
-            out[label] = ann * 100
-
+    for label, months in HORIZONS.items():
+        target = latest_day - 7 if months is None else shift_months(latest_day, months)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[label] = (latest_nav / panel.nav_on_or_before(owner, target) - 1) * 100
     return out
 
-def compute_trailing_returns(daily_returns_map):
+def annualised_returns(trailing: dict) -> dict:
+    """CAGR % from the absolute trailing returns of the multi-year horizons."""
+    return {label: ((1 + trailing[label] / 100) ** (1 / years) - 1) * 100 for label, years in ANNUALISED.items()}
+
+def rolling_cagr(panel: NavPanel, years: int) -> np.ndarray:
+    """
+    `years`-year CAGR % ending on every NAV day of every scheme (aligned with
+    panel.days); NaN where the window starts before the scheme's history.
+    """
+    start_nav = panel.nav_on_or_before(panel.owner, shift_months(panel.days, 12 * years))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((panel.nav / start_nav) ** (1 / years) - 1) * 100
+
+def rolling_summary(panel: NavPanel, values: np.ndarray) -> dict:
     """
-    Given daily_returns: { "YYYY-MM-DD": { "close": float, ... }, ... }
-    Compute trailing returns for 6M and 1Y as percentages.
+    Per-scheme distribution of rolling returns: {stat: array(schemes)}. The
+    finite values are compacted keeping each scheme's run contiguous, so every
+    stat is a segment reduction (np.*.reduceat); the median sorts a NaN-padded
+    (schemes x longest run) view and reads the middle of each row.
     """
-    # 1) build list of (date, nav)
-    records = []
-    for date_str, info in daily_returns_map.items():
-        raw = info.get("nav", info.get("close"))
-        if raw is None:
-            continue
-        try:
-            nav = float(raw)
-            dt  = datetime.strptime(date_str, "%Y-%m-%d")
-        except Exception:
-            continue
-        records.append((dt, nav))
-
-    if not records:
-        return {"6M": None, "1Y": None}
-
-    # 2) series of NAVs
-    nav_s = (
-        pd.Series(
-            [nav for _, nav in records],
-            index=pd.to_datetime([dt for dt, _ in records])
-        )
-        .sort_index()
-    )
-
-    latest_date = nav_s.index.max()
-    latest_nav  = nav_s.loc[latest_date]
-
-    # 3) define deltas
-    periods = {
-        "6M": relativedelta(months=6),
-        "1Y": relativedelta(years=1)
-    }
-
-    trailing = {}
-    for label, delta in periods.items():
-        target = latest_date - delta
-        past = nav_s[nav_s.index <= target]
-        if past.empty:
-            trailing[label] = None
-        else:
-            past_nav = past.iloc[-1]
-            # absolute return * 100 → percentage
-            trailing[label] = (latest_nav / past_nav - 1) * 100
-
-    return trailing
-
-def main():
-    # Fetch only the fields we need, limit to first 10 docs
-    cursor = mf_bkp_collection.find(
-        {},
-        {"schemeCode": 1, "schemeName": 1, "daily_returns": 1}
-    ).limit(10)
-
-    for fund in cursor:
-        _id   = fund["_id"]
-        code  = fund.get("schemeCode")
-        name  = fund.get("schemeName", "<no name>")
-        dr_map = fund.get("daily_returns", {})
-
-        print(f"\n🔍 Computing trailing returns for {code} – {name}")
-        trailing = compute_trailing_returns(dr_map)
-        ann = compute_annualised_returns(dr_map)
-
-        # Update back into MongoDB
-        mf_bkp_collection.update_one(
-            {"_id": _id},
-            {
-                "$set": {
-                    "trailing_returns": trailing,
-                    "trailing_updated": datetime.utcnow(),
-                    "3Y_return": ann["3Y_Annualised"],
-                    "5Y_return": ann["5Y_Annualised"],
-                }
-            }
-        )
-        print(f"✅ Updated document {_id} with trailing_returns.\n")
+    finite = np.isfinite(values)
+    kept = values[finite]
+    count = np.add.reduceat(finite, panel.start)
+    stats = {name: np.full(len(panel.series), np.nan) for name in ("mean", "median", "min", "max", "std", "positive_pct")}
+    stats["count"] = count.astype(float)
+    if not len(kept):
+        return stats
+
+    # reducing at the offsets of the non-empty runs only keeps them strictly increasing
+    has = count > 0
+    offsets = (np.cumsum(count) - count)[has]
+    n = count[has]
+    mean = np.add.reduceat(kept, offsets) / n
+    deviation = kept - np.repeat(mean, n)
+    stats["mean"][has] = mean
+    stats["min"][has] = np.minimum.reduceat(kept, offsets)
+    stats["max"][has] = np.maximum.reduceat(kept, offsets)
+    stats["std"][has] = np.sqrt(np.add.reduceat(deviation ** 2, offsets) / n)
+    stats["positive_pct"][has] = np.add.reduceat(kept > 0, offsets) / n * 100
+
+    padded = np.full((len(n), n.max()), np.nan)
+    padded[np.arange(n.max()) < n[:, None]] = kept
+    padded.sort(axis=1)
+    middle = np.stack([(n - 1) // 2, n // 2], axis=1)
+    stats["median"][has] = np.take_along_axis(padded, middle, axis=1).mean(axis=1)
+    return stats
+
+def _value(x):
+    return None if not np.isfinite(x) else round(float(x), 4)
+
+def compute_chunk(navs: dict) -> dict:
+    """{series: fields to $set} for one chunk of loaded NAV histories."""
+    panel = NavPanel(navs)
+    if not panel.series:
+        return {}
+    trailing = trailing_returns(panel)
+    annualised = annualised_returns(trailing)
+    rolling = {f"{y}Y": rolling_summary(panel, rolling_cagr(panel, y)) for y in ROLLING_YEARS}
+
+    results = {}
+    for i, series in enumerate(panel.series):
+        results[series] = {
+            "trailing_returns": {label: _value(values[i]) for label, values in trailing.items()},
+            "annualised_returns": {label: _value(values[i]) for label, values in annualised.items()},
+            "rolling_returns": {
+                label: {stat: _value(values[i]) for stat, values in summary.items()}
+                for label, summary in rolling.items()
+            },
+            "3Y_return": _value(annualised["3Y"][i]),
+            "5Y_return": _value(annualised["5Y"][i]),
+        }
+    return results
+
+def main(limit=None):
+    started = time.time()
+    cursor = mf_bkp_collection.find({"schemeCode": {"$exists": True}}, {"_id": 0, "schemeCode": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+    codes = {str(doc["schemeCode"]): doc["schemeCode"] for doc in cursor}
+    keys = list(codes)
+
+    now = datetime.utcnow()
+    ops, written = [], 0
+    for i in range(0, len(keys), RETURN_CHUNK_SIZE):
+        for series, fields in compute_chunk(load_navs(keys[i:i + RETURN_CHUNK_SIZE])).items():
+            ops.append(UpdateOne({"schemeCode": codes[series]}, {"$set": {**fields, "trailing_updated": now}}))
+            if len(ops) >= RETURN_WRITE_BATCH_SIZE:
+                mf_bkp_collection.bulk_write(ops, ordered=False)
+                written += len(ops)
+                ops = []
+    if ops:
+        mf_bkp_collection.bulk_write(ops, ordered=False)
+        written += len(ops)
+    print(f"✅ Updated trailing returns for {written} of {len(keys)} schemes in {time.time() - started:.1f}s.\n")
 
 if __name__ == "__main__":
     main()
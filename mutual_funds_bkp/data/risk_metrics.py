@@ -0,0 +1,164 @@
+from pymongo import UpdateOne
+from datetime import datetime
+import numpy as np
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from db import mf_bkp_collection
+from nav_store import load_nav, load_navs
+
+# Batch risk metrics for every scheme against one benchmark. NAVs are aligned
+# on the benchmark's trading days (last NAV on or before each day), giving a
+# (schemes x days) price matrix per chunk; every metric for every window is
+# then a handful of masked reductions over that matrix. Results are written
+# back to mutual_funds_bkp with unordered bulk writes keyed by schemeCode:
+#
+#   risk_metrics: {"1y": {...}, "3y": {...}, "5y": {...}}
+#   sharpe_ratio, sortino_ratio, beta, alpha, standard_deviation,
+#   information_ratio, r_squared, maximum_drawdown    (3y window, as reported)
+#
+# Conventions: standard_deviation and alpha are annualised %, sharpe / sortino
+# / information ratios are annualised, maximum_drawdown is a fraction (-0.25).
+#
+#   python risk_metrics.py
+
+RISK_BENCHMARK = os.getenv("RISK_BENCHMARK", "^NSEI")
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.065"))
+RISK_CHUNK_SIZE = int(os.getenv("RISK_CHUNK_SIZE", "2000"))
+RISK_WRITE_BATCH_SIZE = int(os.getenv("RISK_WRITE_BATCH_SIZE", "1000"))
+# share of a window's benchmark days a scheme must have returns for
+RISK_MIN_COVERAGE = float(os.getenv("RISK_MIN_COVERAGE", "0.8"))
+# a NAV older than this many days is not carried forward onto the grid
+MAX_STALE_DAYS = 7
+TRADING_DAYS = 252
+WINDOWS = {"1y": 1, "3y": 3, "5y": 5}
+REPORTED_WINDOW = "3y"
+
+def align(grid: np.ndarray, days: np.ndarray, nav: np.ndarray) -> np.ndarray:
+    """NAV on each grid day (carried forward up to MAX_STALE_DAYS), NaN elsewhere."""
+    out = np.full(len(grid), np.nan)
+    if not len(days):
+        return out
+    idx = np.searchsorted(days, grid, side="right") - 1
+    valid = idx >= 0
+    idx = np.maximum(idx, 0)
+    valid &= (grid - days[idx]) <= MAX_STALE_DAYS
+    out[valid] = nav[idx[valid]]
+    return out
+
+def window_metrics(prices: np.ndarray, bench: np.ndarray, rf: float = RISK_FREE_RATE) -> dict:
+    """
+    Every metric for each row of prices (schemes x days) against the bench
+    prices on the same days. Returns {metric: array(schemes)} with NaN where a
+    scheme lacks coverage.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = prices[:, 1:] / prices[:, :-1] - 1
+        b = bench[1:] / bench[:-1] - 1
+        mask = np.isfinite(r) & np.isfinite(b)
+        n = mask.sum(axis=1)
+        enough = n >= max(RISK_MIN_COVERAGE * len(b), 2)
+
+        rz = np.where(mask, r, 0.0)
+        bz = np.where(mask, b, 0.0)
+        mean_r = rz.sum(axis=1) / n
+        mean_b = bz.sum(axis=1) / n
+        dr = np.where(mask, r - mean_r[:, None], 0.0)
+        db = np.where(mask, b - mean_b[:, None], 0.0)
+        var_r = (dr * dr).sum(axis=1) / (n - 1)
+        var_b = (db * db).sum(axis=1) / (n - 1)
+        cov = (dr * db).sum(axis=1) / (n - 1)
+
+        rf_d = (1 + rf) ** (1 / TRADING_DAYS) - 1
+        excess = mean_r - rf_d
+        vol = np.sqrt(var_r * TRADING_DAYS)
+        downside = np.sqrt((np.minimum(rz - rf_d, 0.0) ** 2 * mask).sum(axis=1) / n * TRADING_DAYS)
+        beta = cov / var_b
+
+        active = np.where(mask, r - b, 0.0)
+        mean_a = active.sum(axis=1) / n
+        da = np.where(mask, active - mean_a[:, None], 0.0)
+        tracking = np.sqrt((da * da).sum(axis=1) / (n - 1) * TRADING_DAYS)
+
+        peak = np.fmax.accumulate(prices, axis=1)
+        drawdown = np.fmin.reduce(prices / peak - 1, axis=1, initial=np.nan)
+
+        out = {
+            "sharpe_ratio": excess * TRADING_DAYS / vol,
+            "sortino_ratio": excess * TRADING_DAYS / downside,
+            "beta": beta,
+            "alpha": (excess - beta * (mean_b - rf_d)) * TRADING_DAYS * 100,
+            "standard_deviation": vol * 100,
+            "information_ratio": mean_a * TRADING_DAYS / tracking,
+            "r_squared": cov * cov / (var_r * var_b),
+            "maximum_drawdown": drawdown,
+        }
+    return {name: np.where(enough & np.isfinite(values), values, np.nan) for name, values in out.items()}
+
+def compute_chunk(navs: dict, grid: np.ndarray, bench: np.ndarray) -> dict:
+    """{series: {window: {metric: float|None}}} for one chunk of loaded NAVs."""
+    series = list(navs)
+    prices = np.vstack([align(grid, *navs[s]) for s in series]) if series else np.empty((0, len(grid)))
+    results = {s: {} for s in series}
+    end = grid[-1]
+    for label, years in WINDOWS.items():
+        start = np.searchsorted(grid, end - round(years * 365.25), side="left")
+        metrics = window_metrics(prices[:, start:], bench[start:])
+        for i, s in enumerate(series):
+            results[s][label] = {
+                name: (None if np.isnan(values[i]) else round(float(values[i]), 4))
+                for name, values in metrics.items()
+            }
+    return results
+
+def _update(scheme_code, windows: dict, now: datetime) -> UpdateOne:
+    return UpdateOne({"schemeCode": scheme_code}, {"$set": {
+        "risk_metrics": windows,
+        **windows[REPORTED_WINDOW],
+        "risk_metrics_benchmark": RISK_BENCHMARK,
+        "risk_metrics_updated": now,
+    }})
+
+def compute_risk_metrics(collection=mf_bkp_collection, benchmark: str = RISK_BENCHMARK, limit: int = None) -> dict:
+    """Recompute every window's metrics for all schemes; returns run counters."""
+    started = time.time()
+    longest = max(WINDOWS.values())
+    grid, bench = load_nav(benchmark)
+    if len(grid) < 2:
+        raise ValueError(f"No benchmark history for {benchmark}")
+    start = np.searchsorted(grid, grid[-1] - round(longest * 365.25) - 1, side="left")
+    grid, bench = grid[start:], bench[start:]
+    since = int(grid[0]) - MAX_STALE_DAYS
+
+    cursor = collection.find({"schemeCode": {"$exists": True}}, {"_id": 0, "schemeCode": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+    codes = {str(doc["schemeCode"]): doc["schemeCode"] for doc in cursor}
+
+    stats = {"schemes": len(codes), "with_metrics": 0, "written": 0}
+    now = datetime.now()
+    keys = list(codes)
+    ops = []
+    for i in range(0, len(keys), RISK_CHUNK_SIZE):
+        results = compute_chunk(load_navs(keys[i:i + RISK_CHUNK_SIZE], since=since), grid, bench)
+        for series, windows in results.items():
+            if all(v is None for w in windows.values() for v in w.values()):
+                continue
+            stats["with_metrics"] += 1
+            ops.append(_update(codes[series], windows, now))
+            if len(ops) >= RISK_WRITE_BATCH_SIZE:
+                collection.bulk_write(ops, ordered=False)
+                stats["written"] += len(ops)
+                ops = []
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+        stats["written"] += len(ops)
+
+    stats["seconds"] = round(time.time() - started, 1)
+    print(f"✅ Risk metrics: {stats}")
+    return stats
+
+if __name__ == "__main__":
+    compute_risk_metrics()
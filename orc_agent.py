@@ -2,12 +2,8 @@ from sgb.main import sgb_tool
 from mutual_funds.main import mutual_funds_tool
 from bonds.main import bonds_tool
 from etf.main import etfs_tool
-from langchain.agents import initialize_agent, Tool, AgentType
-from dotenv import load_dotenv
-import os
-from langchain_community.chat_models import ChatOpenAI
-
-load_dotenv()
+from langchain.agents import Tool
+from llm_pool import get_agent_executor, get_llm
 
 # Define tools
 tools = [
@@ -51,10 +47,12 @@ tools = [
 
 # Lazy initialization of the agent
 def get_agent():
-    return initialize_agent(
-        tools=tools,
-        llm=ChatOpenAI(model="gpt-4o", temperature=0.2, openai_api_key=os.getenv("OPENAI_API_KEY")),
-        agent=AgentType.OPENAI_FUNCTIONS,
-        handle_parsing_errors=True,
-        verbose=True
-    )
\ No newline at end of file
+    return get_agent_executor("ORC", tools, "gpt-4o", temperature=0.2)
+
+def initialize_assembler_agent():
+    return get_llm("gpt-4o", temperature=0.2)
+
+def invoke_assembler_agent(input_query):
+    assembler_agent = initialize_assembler_agent()
+    response = assembler_agent.predict(input_query)
+    return response
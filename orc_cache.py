@@ -0,0 +1,154 @@
+from cachetools import TTLCache, cached
+from db import mutual_funds_collection, etf_collection, bonds_collection, sgb_collection
+from redis_pool import redis_client
+from threading import Event, Lock
+import hashlib
+import re
+import uuid
+import json
+import time
+import os
+
+# Content-addressed cache of orchestrator outputs, shared by every web and
+# worker process through Redis:
+#
+#   orc_cache:{key}       the cached output (expires after ORC_CACHE_TTL_SECONDS)
+#   orc_cache:lru         zset key -> last access; trimmed to ORC_CACHE_MAX_ENTRIES
+#   orc_cache:lock:{key}  single-flight lock held by the process computing key
+#
+# The key hashes the canonical inputs together with data_version(), so any
+# catalog change moves every profile to a fresh key instead of serving
+# recommendations built on stale fund data. The ingest and batch jobs call
+# bump_data_version() when they finish. An output carrying a failed tool's
+# "Error: <tool> failed" text is returned but never cached.
+
+ORC_CACHE_TTL_SECONDS = int(os.getenv("ORC_CACHE_TTL_SECONDS", "21600"))
+ORC_CACHE_MAX_ENTRIES = int(os.getenv("ORC_CACHE_MAX_ENTRIES", "1000"))
+ORC_CACHE_LOCK_SECONDS = int(os.getenv("ORC_CACHE_LOCK_SECONDS", "900"))
+ORC_CACHE_POLL_SECONDS = float(os.getenv("ORC_CACHE_POLL_SECONDS", "0.5"))
+DATA_VERSION_TTL_SECONDS = int(os.getenv("DATA_VERSION_TTL_SECONDS", "60"))
+
+CATALOG_COLLECTIONS = [mutual_funds_collection, etf_collection, bonds_collection, sgb_collection]
+DATA_VERSION_KEY = "catalog:version"
+LRU_KEY = "orc_cache:lru"
+# what agent_entry._run_tool hands the assembler in place of a failed tool's output
+TOOL_ERROR = re.compile(r"Error: \w+ failed")
+
+_RELEASE = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+""")
+
+_inflight = {}
+_inflight_lock = Lock()
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+# TTLCache is not thread-safe and is read from every request thread
+@cached(TTLCache(maxsize=1, ttl=DATA_VERSION_TTL_SECONDS), lock=Lock())
+def data_version() -> str:
+    """
+    Stamp of the catalog the agents read: document count and newest _id per
+    collection plus the counter bump_data_version() increments after in-place
+    updates (which leave counts and ids unchanged).
+    """
+    parts = [str(int(redis_client.get(DATA_VERSION_KEY) or 0))]
+    for collection in CATALOG_COLLECTIONS:
+        newest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        parts.append(f"{collection.name}:{collection.estimated_document_count()}:{newest['_id'] if newest else ''}")
+    return "|".join(parts)
+
+def bump_data_version():
+    """Call after updating catalog documents in place so cached outputs are not reused."""
+    redis_client.incr(DATA_VERSION_KEY)
+    data_version.cache_clear()
+
+def cache_key(inputs: dict) -> str:
+    payload = json.dumps({"inputs": _canonical(inputs), "data": data_version()}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get(key: str):
+    value = redis_client.get(f"orc_cache:{key}")
+    if value is None:
+        return None
+    redis_client.zadd(LRU_KEY, {key: time.time()})
+    return value.decode()
+
+def put(key: str, value: str):
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.set(f"orc_cache:{key}", value, ex=ORC_CACHE_TTL_SECONDS)
+    pipe.zadd(LRU_KEY, {key: time.time()})
+    # entries that expired on their own drop out of the zset here too
+    pipe.zremrangebyscore(LRU_KEY, "-inf", time.time() - ORC_CACHE_TTL_SECONDS)
+    pipe.execute()
+    overflow = redis_client.zcard(LRU_KEY) - ORC_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        evicted = [k.decode() for k, _ in redis_client.zpopmin(LRU_KEY, overflow)]
+        redis_client.delete(*[f"orc_cache:{k}" for k in evicted])
+
+def _compute_once(key: str, compute):
+    """Cross-process single flight: one holder of the Redis lock computes, the rest wait for its result."""
+    lock_key = f"orc_cache:lock:{key}"
+    token = str(uuid.uuid4())
+    while True:
+        value = get(key)
+        if value is not None:
+            return value
+        if redis_client.set(lock_key, token, nx=True, ex=ORC_CACHE_LOCK_SECONDS):
+            try:
+                value = compute()
+                if not TOOL_ERROR.search(value):
+                    put(key, value)
+                return value
+            finally:
+                # only release our own lock, not one re-acquired after ours expired
+                _RELEASE(keys=[lock_key], args=[token])
+        # someone else is computing; if they fail the lock disappears and we take over
+        time.sleep(ORC_CACHE_POLL_SECONDS)
+
+def memoize(inputs: dict, compute):
+    """
+    Return the cached output for `inputs`, or run compute() once across all
+    concurrent identical requests (threads here, and other processes via the
+    Redis lock) and cache it.
+    """
+    key = cache_key(inputs)
+    value = get(key)
+    if value is not None:
+        print(f"⚡ Orchestrator cache hit {key[:12]}")
+        return value
+
+    with _inflight_lock:
+        waiter = _inflight.get(key)
+        leader = waiter is None
+        if leader:
+            waiter = _inflight[key] = {"done": Event(), "value": None, "error": None}
+    if not leader:
+        waiter["done"].wait()
+        if waiter["error"] is not None:
+            raise waiter["error"]
+        return waiter["value"]
+
+    try:
+        waiter["value"] = _compute_once(key, compute)
+        return waiter["value"]
+    except Exception as e:
+        waiter["error"] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        waiter["done"].set()
+
+def lookup(inputs: dict):
+    """Cached output for `inputs` without computing it; None on a miss."""
+    return get(cache_key(inputs))
@@ -0,0 +1,124 @@
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from datetime import datetime
+import numpy as np
+from db import mutual_funds_collection, etf_collection
+from orc_cache import bump_data_version
+
+# Category-relative ranks for every return, risk and fee metric, stored on
+# each fund document so the toolkits can hand the agents exact peer standing
+# ("Top 15%", "outperformed 90% of peers") instead of raw numbers to compare:
+#
+#   peer_ranks: {"3_year_return": {"rank": 4, "peers": 38, "percentile": 91.9}, ...}
+#
+# rank 1 is the best fund in the category (ties share the better rank), peers
+# counts the funds with a value for that metric and percentile is the share of
+# the other peers the fund strictly beats (tied funds do not beat each other,
+# so two funds tied at the top of five peers are both rank 1 at 75%, not
+# 100%). A refresh only re-ranks the categories touched by the funds an
+# extractor just pushed.
+
+# metric -> True when higher is better
+RANK_METRICS = {
+    "1_week_return": True,
+    "1_month_return": True,
+    "3_month_return": True,
+    "6_month_return": True,
+    "1_year_return": True,
+    "3_year_return": True,
+    "5_year_return": True,
+    "10_year_return": True,
+    "sharpe_ratio": True,
+    "sortino_ratio": True,
+    "alpha": True,
+    "information_ratio": True,
+    "r_squared": True,
+    "beta": False,
+    "standard_deviation": False,
+    "expense_ratio": False,
+}
+
+PEER_WRITE_BATCH_SIZE = 1000
+
+def _column(docs: list, field: str) -> np.ndarray:
+    """Numeric values of one field, NaN for missing or "" (the extractors' blank)."""
+    return np.array([
+        float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+        for v in (doc.get(field) for doc in docs)
+    ], dtype=float)
+
+def group_ranks(group: np.ndarray, values: np.ndarray, higher_is_better: bool = True):
+    """
+    Competition rank (1 = best) of each value within its group, the number of
+    valued peers in that group and how many of them are strictly worse; all
+    three are 0 where the value is NaN.
+    """
+    ranks = np.zeros(len(values), dtype=int)
+    peers = np.zeros(len(values), dtype=int)
+    worse = np.zeros(len(values), dtype=int)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return ranks, peers, worse
+    g = group[valid]
+    v = -values[valid] if higher_is_better else values[valid]
+    order = np.lexsort((v, g))
+    g_sorted, v_sorted = g[order], v[order]
+    positions = np.arange(len(order))
+
+    new_group = np.r_[True, g_sorted[1:] != g_sorted[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    new_value = new_group | np.r_[True, v_sorted[1:] != v_sorted[:-1]]
+    first_tie = np.maximum.accumulate(np.where(new_value, positions, 0))
+    end_value = np.r_[new_value[1:], True]
+    last_tie = np.minimum.accumulate(np.where(end_value, positions, len(order))[::-1])[::-1]
+    counts = np.bincount(g_sorted, minlength=group.max() + 1)
+
+    ranks[valid[order]] = first_tie - group_start + 1
+    peers[valid[order]] = counts[g_sorted]
+    worse[valid[order]] = group_start + counts[g_sorted] - 1 - last_tie
+    return ranks, peers, worse
+
+def compute_peer_ranks(docs: list) -> list:
+    """{metric: {rank, peers, percentile}} for each document, ranked within its category."""
+    _, group = np.unique(np.array([doc.get("category") or "" for doc in docs], dtype=str), return_inverse=True)
+    out = [{} for _ in docs]
+    for field, higher_is_better in RANK_METRICS.items():
+        ranks, peers, worse = group_ranks(group, _column(docs, field), higher_is_better)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentile = np.where(peers > 1, 100.0 * worse / (peers - 1), 100.0)
+        for i in np.flatnonzero(ranks):
+            out[i][field] = {"rank": int(ranks[i]), "peers": int(peers[i]), "percentile": round(float(percentile[i]), 1)}
+    return out
+
+def refresh_peer_ranks(collection, fund_names: list = None) -> int:
+    """
+    Recompute and store peer_ranks for the categories of `fund_names` (every
+    category when None). Returns the number of documents updated.
+    """
+    query = {}
+    if fund_names is not None:
+        categories = collection.distinct("category", {"fund_name": {"$in": list(fund_names)}})
+        if not categories:
+            return 0
+        query = {"category": {"$in": categories}}
+
+    docs = list(collection.find(query, {"_id": 0, "fund_name": 1, "category": 1, **{f: 1 for f in RANK_METRICS}}))
+    docs = [doc for doc in docs if doc.get("fund_name")]
+    now = datetime.now()
+    ops = [
+        UpdateOne({"fund_name": doc["fund_name"]}, {"$set": {"peer_ranks": ranks, "peer_ranks_updated": now}})
+        for doc, ranks in zip(docs, compute_peer_ranks(docs))
+    ]
+    for i in range(0, len(ops), PEER_WRITE_BATCH_SIZE):
+        collection.bulk_write(ops[i:i + PEER_WRITE_BATCH_SIZE], ordered=False)
+    if ops:
+        bump_data_version()
+    print(f"🏅 Peer ranks refreshed for {len(ops)} funds in {collection.name}")
+    return len(ops)
+
+if __name__ == "__main__":
+    try:
+        for collection in (mutual_funds_collection, etf_collection):
+            refresh_peer_ranks(collection)
+    except PyMongoError as e:
+        print(f"❌ MongoDB Error: {e}")
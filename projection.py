@@ -0,0 +1,81 @@
+import numpy as np
+
+# Vectorised SIP + lumpsum maturity projections. Every function broadcasts
+# its array arguments, so one call covers a whole grid of scenarios; the
+# single-strategy maturity in main goes through the same project/allocate.
+# Conventions: effective annual rates, monthly compounding, n = round(12 *
+# years) months, SIP paid at month end unless annuity_due.
+
+def monthly_rate(annual_rate):
+    """Convert effective annual rate(s) to the equivalent monthly rate(s)."""
+    return (1.0 + np.asarray(annual_rate, dtype=float)) ** (1.0 / 12.0) - 1.0
+
+def months(years):
+    return np.rint(12 * np.maximum(np.asarray(years, dtype=float), 0)).astype(int)
+
+def _sip_factor(r_m, n):
+    """Sum of (1 + r)^k for k < n, i.e. FV of 1 per month; n where r == 0."""
+    flat = np.abs(r_m) < 1e-12
+    safe_r = np.where(flat, 1.0, r_m)
+    return np.where(flat, n, ((1.0 + r_m) ** n - 1.0) / safe_r)
+
+def project(monthly, lumpsum, annual_rate, years, *, annuity_due: bool = False) -> dict:
+    """
+    Maturity of monthly SIP + lumpsum for every broadcast combination of
+    the inputs. Returns arrays: monthly_fv, lumpsum_fv, maturity, invested, returns.
+    """
+    monthly, lumpsum, annual_rate, years = np.broadcast_arrays(
+        np.asarray(monthly, dtype=float), np.asarray(lumpsum, dtype=float),
+        np.asarray(annual_rate, dtype=float), np.asarray(years, dtype=float),
+    )
+    n = months(years)
+    r_m = monthly_rate(annual_rate)
+
+    monthly_fv = np.where((n > 0) & (monthly > 0), monthly * _sip_factor(r_m, n), 0.0)
+    if annuity_due:
+        monthly_fv = monthly_fv * (1.0 + r_m)
+    lumpsum_fv = np.where((n > 0) & (lumpsum > 0), lumpsum * (1.0 + r_m) ** n, lumpsum)
+
+    invested = np.rint(np.maximum(monthly, 0) * 12 * np.maximum(years, 0)) + np.rint(np.maximum(lumpsum, 0))
+    maturity = monthly_fv + lumpsum_fv
+    return {
+        "monthly_fv": monthly_fv,
+        "lumpsum_fv": lumpsum_fv,
+        "maturity": maturity,
+        "invested": invested,
+        "returns": maturity - invested,
+    }
+
+def allocate(amount, percentages):
+    """Rupee split of amount(s) across allocation percentages (last axis), rounded like int(round())."""
+    amount = np.asarray(amount, dtype=float)
+    return np.rint(amount[..., None] * np.asarray(percentages, dtype=float) / 100.0).astype(int)
+
+def corpus_curves(monthly, lumpsum, annual_rate, years, *, annuity_due: bool = False):
+    """
+    Month-by-month corpus for each scenario (inputs broadcast to 1-D).
+    Returns (month_index, corpus) with corpus shaped (scenarios, max_months + 1);
+    months past a scenario's horizon are NaN.
+    """
+    monthly, lumpsum, annual_rate, years = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            np.asarray(monthly, dtype=float), np.asarray(lumpsum, dtype=float),
+            np.asarray(annual_rate, dtype=float), np.asarray(years, dtype=float),
+        )
+    )
+    n = months(years)
+    t = np.arange(int(n.max(initial=0)) + 1)
+    r_m = monthly_rate(annual_rate)[:, None]
+
+    sip = np.maximum(monthly, 0)[:, None] * _sip_factor(r_m, t[None, :])
+    if annuity_due:
+        sip = sip * (1.0 + r_m)
+    corpus = sip + np.maximum(lumpsum, 0)[:, None] * (1.0 + r_m) ** t[None, :]
+    corpus[t[None, :] > n[:, None]] = np.nan
+    return t, corpus
+
+def sensitivity_grid(monthly, lumpsum, annual_rates, years, *, annuity_due: bool = False) -> dict:
+    """project() over the outer product rates x horizons; each array is (len(rates), len(years))."""
+    rates = np.asarray(annual_rates, dtype=float)[:, None]
+    horizons = np.asarray(years, dtype=float)[None, :]
+    return project(monthly, lumpsum, rates, horizons, annuity_due=annuity_due)
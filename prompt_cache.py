@@ -0,0 +1,222 @@
+from threading import Lock
+from dotenv import load_dotenv
+import numpy as np
+import hashlib
+import sqlite3
+import time
+import re
+import os
+
+load_dotenv()
+
+# On-disk prompt -> response cache for the templated single-shot LLM calls
+# (pre-agents, mixers, reasoner). Entries are scoped per template and model.
+# A lookup tries the exact prompt hash first, then the nearest cached prompt
+# by cosine similarity of a local hashed character-trigram embedding.
+#
+# The template is fixed per scope, so two prompts differ only in what was
+# substituted into it. A near match is served only when those variables are
+# identical: the ordered sequence of numbers (amounts, horizons, metrics) and
+# of enum tokens (risk level, horizon bucket, goal, fund type) must match
+# exactly. "Risk Appetite: High" vs "Low" embeds at ~0.9999 cosine, so the
+# embedding alone would hand one profile's answer to another; it only absorbs
+# wording and whitespace differences around the variables.
+#
+# SQLite (WAL) keeps the store shared by every process on the host; each
+# process keeps an in-memory matrix per scope and pulls in rows written by
+# others on a miss.
+
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+PROMPT_CACHE_PATH = os.getenv("PROMPT_CACHE_PATH", os.path.expanduser("~/.cache/moneyfi/prompt_cache.sqlite3"))
+PROMPT_CACHE_THRESHOLD = float(os.getenv("PROMPT_CACHE_THRESHOLD", "0.97"))
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", str(7 * 86400)))
+EMBEDDING_DIM = 4096
+
+NUMBER = re.compile(r"-?\d+(?:,\d{3})*(?:\.\d+)?")
+# words the templates are filled with from the user profile; any difference
+# in them is a different question, however close the rest of the prompt is
+ENUM_TOKEN = re.compile(
+    r"\b(?:very|low|moderate|medium|high|conservative|balanced|aggressive"
+    r"|short|long|monthly|lumpsum|equity|debt|hybrid|gold|silver|index|elss|etf|bond|sgb"
+    r"|retirement|education|wedding|marriage|house|home|car|travel|emergency|wealth|tax|income|growth)\b",
+    re.IGNORECASE,
+)
+VARIABLE = re.compile(f"{NUMBER.pattern}|{ENUM_TOKEN.pattern}", re.IGNORECASE)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        scope TEXT NOT NULL,
+        prompt_hash TEXT NOT NULL,
+        variables TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        UNIQUE (scope, prompt_hash)
+    );
+    CREATE TABLE IF NOT EXISTS stats (
+        scope TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, kind)
+    );
+"""
+
+# one script per PRAGMA user_version step, each run once per store file
+MIGRATIONS = [
+    # 1: drop the earlier layouts; "prompts" served near matches gated on
+    #    numbers only, "responses" was exact-only and has no embeddings
+    """
+    DROP TABLE IF EXISTS prompts;
+    DROP TABLE IF EXISTS responses;
+    """,
+]
+
+_lock = Lock()
+_conn = None
+_index = {}   # scope -> {"last_id", "ids", "variables", "vectors"}
+_stats = {}   # scope -> {"exact", "semantic", "miss"} for this process
+
+def migrate(conn: sqlite3.Connection):
+    """Bring a store file up to len(MIGRATIONS); a no-op once it is current."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for step, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.executescript(script)
+        conn.execute(f"PRAGMA user_version = {step}")
+        conn.commit()
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(PROMPT_CACHE_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(PROMPT_CACHE_PATH, check_same_thread=False, timeout=30)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        migrate(_conn)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+def _normalize(prompt: str) -> str:
+    return " ".join(prompt.split())
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(_normalize(prompt).encode()).hexdigest()
+
+def variables(prompt: str) -> str:
+    """Ordered numbers and enum tokens of a prompt; a near match must reproduce them exactly."""
+    return "|".join(token.replace(",", "").lower() for token in VARIABLE.findall(prompt))
+
+def embed(prompt: str) -> np.ndarray:
+    """L2-normalised hashed character-trigram counts (numbers masked; they are matched exactly)."""
+    text = NUMBER.sub("#", _normalize(prompt).lower())
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    if len(text) >= 3:
+        grams = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        codes = (grams[:-2] * 1000003 + grams[1:-1]) * 1000003 + grams[2:]
+        np.add.at(vector, (codes % EMBEDDING_DIM).astype(np.int64), 1.0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def _record(scope: str, kind: str):
+    counts = _stats.setdefault(scope, {"exact": 0, "semantic": 0, "miss": 0})
+    counts[kind] += 1
+    _connect().execute(
+        "INSERT INTO stats (scope, kind, count) VALUES (?, ?, 1) "
+        "ON CONFLICT (scope, kind) DO UPDATE SET count = count + 1",
+        (scope, kind),
+    )
+    _conn.commit()
+
+def _refresh(scope: str) -> dict:
+    """Append rows other processes have written since this process last looked."""
+    entry = _index.setdefault(scope, {"last_id": 0, "ids": [], "variables": [], "vectors": np.zeros((0, EMBEDDING_DIM), dtype=np.float32)})
+    rows = _connect().execute(
+        "SELECT id, variables, embedding FROM entries WHERE scope = ? AND id > ? ORDER BY id",
+        (scope, entry["last_id"]),
+    ).fetchall()
+    if rows:
+        entry["ids"].extend(r[0] for r in rows)
+        entry["variables"].extend(r[1] for r in rows)
+        entry["vectors"] = np.vstack([entry["vectors"]] + [np.frombuffer(r[2], dtype=np.float32) for r in rows])
+        entry["last_id"] = rows[-1][0]
+    return entry
+
+def lookup(scope: str, prompt: str):
+    """Cached response for `prompt` in `scope`, or None."""
+    fresh_after = time.time() - PROMPT_CACHE_TTL_SECONDS
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT response FROM entries WHERE scope = ? AND prompt_hash = ? AND created_at >= ?",
+            (scope, _prompt_hash(prompt), fresh_after),
+        ).fetchone()
+        if row:
+            _record(scope, "exact")
+            return row[0]
+
+        entry = _refresh(scope)
+        wanted = variables(prompt)
+        candidates = np.array([v == wanted for v in entry["variables"]], dtype=bool)
+        if candidates.any():
+            similarity = np.where(candidates, entry["vectors"] @ embed(prompt), -1.0)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= PROMPT_CACHE_THRESHOLD:
+                row = conn.execute(
+                    "SELECT response FROM entries WHERE id = ? AND created_at >= ?",
+                    (entry["ids"][best], fresh_after),
+                ).fetchone()
+                if row:
+                    _record(scope, "semantic")
+                    return row[0]
+
+        _record(scope, "miss")
+        return None
+
+def store(scope: str, prompt: str, response: str):
+    prompt_hash = _prompt_hash(prompt)
+    with _lock:
+        conn = _connect()
+        # replace the row (new id) so an expired entry is re-indexed with a fresh timestamp
+        conn.execute("DELETE FROM entries WHERE scope = ? AND prompt_hash = ?", (scope, prompt_hash))
+        conn.execute(
+            "INSERT INTO entries (scope, prompt_hash, variables, embedding, response, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (scope, prompt_hash, variables(prompt), embed(prompt).tobytes(), response, time.time()),
+        )
+        conn.commit()
+
+def cached_predict(template: str, llm, prompt: str) -> str:
+    """llm.predict(prompt) through the cache, scoped by template name and the llm's model."""
+    if not PROMPT_CACHE_ENABLED:
+        return llm.predict(prompt)
+    scope = f"{template}:{getattr(llm, 'model_name', 'unknown')}"
+    try:
+        response = lookup(scope, prompt)
+    except sqlite3.Error as e:
+        print(f"⚠️ Prompt cache lookup failed for {scope}: {e}")
+        response = None
+    if response is not None:
+        return response
+
+    response = llm.predict(prompt)
+    try:
+        store(scope, prompt, response)
+    except sqlite3.Error as e:
+        print(f"⚠️ Prompt cache write failed for {scope}: {e}")
+    return response
+
+def hit_rates(process_only: bool = False) -> dict:
+    """{scope: {"exact", "semantic", "miss", "hit_rate"}} since the store was created (or for this process)."""
+    with _lock:
+        if process_only:
+            counts = {scope: dict(c) for scope, c in _stats.items()}
+        else:
+            counts = {}
+            for scope, kind, count in _connect().execute("SELECT scope, kind, count FROM stats"):
+                counts.setdefault(scope, {"exact": 0, "semantic": 0, "miss": 0})[kind] = count
+    for c in counts.values():
+        total = c["exact"] + c["semantic"] + c["miss"]
+        c["hit_rate"] = round((c["exact"] + c["semantic"]) / total, 3) if total else 0.0
+    return counts
+
+if __name__ == "__main__":
+    for scope, c in sorted(hit_rates().items()):
+        print(f"📊 {scope}: hit_rate={c['hit_rate']} exact={c['exact']} semantic={c['semantic']} miss={c['miss']}")
@@ -0,0 +1,186 @@
+import re
+
+# Deterministic rule tables behind the mutual fund / ETF pre-agent prompts.
+# build_mutual_fund_filter and build_etf_filter turn (risk, horizon, amount)
+# into the same Mongo filter the pre-agent is asked to write.
+
+MF_CATEGORIES = [
+    'DT-BK & PSU', 'DT-CB', 'DT-CR', 'DT-DB', 'DT-Floater', 'DT-GL',
+    'DT-Gilt 10Y CD', 'DT-LD', 'DT-LIQ', 'DT-LONG D', 'DT-M to LD', 'DT-MD', 'DT-MM', 'DT-OTH', 'DT-OVERNHT',
+    'DT-SD', 'DT-TM', 'DT-USD', 'EQ-BANK', 'EQ-Consumption', 'EQ-DIV Y', 'EQ-ELSS', 'EQ-Energy', 'EQ-FLX', 'EQ-INFRA',
+    'EQ-INTL', 'EQ-IT', 'EQ-L&MC', 'EQ-LC', 'EQ-MC', 'EQ-MLC', 'EQ-MNC', 'EQ-PSU', 'EQ-Pharma', 'EQ-SC', 'EQ-T-ESG',
+    'EQ-THEMATIC', 'EQ-VAL', 'Gold-Funds', 'HY-AH', 'HY-AR', 'HY-BH', 'HY-CH', 'HY-DAA', 'HY-EQ S', 'HY-MAA', 'Silver-Funds'
+]
+
+DEBT = [c for c in MF_CATEGORIES if c.startswith("DT-")]
+HYBRID = [c for c in MF_CATEGORIES if c.startswith("HY-")]
+EQUITY = [c for c in MF_CATEGORIES if c.startswith("EQ-")]
+SECTORAL = ['EQ-BANK', 'EQ-Consumption', 'EQ-Energy', 'EQ-INFRA', 'EQ-IT', 'EQ-MNC', 'EQ-PSU', 'EQ-Pharma']
+GROWTH_EQUITY = ['EQ-LC', 'EQ-L&MC', 'EQ-MLC', 'EQ-FLX', 'EQ-MC', 'EQ-SC']
+
+RISK_LEVELS = ["Low", "Moderate-Low", "Moderate", "High"]
+
+RISK_ALIASES = {
+    "low": "Low",
+    "conservative": "Low",
+    "very low": "Low",
+    "moderate-low": "Moderate-Low",
+    "moderate low": "Moderate-Low",
+    "moderately low": "Moderate-Low",
+    "low-moderate": "Moderate-Low",
+    "low to moderate": "Moderate-Low",
+    "moderate": "Moderate",
+    "medium": "Moderate",
+    "balanced": "Moderate",
+    "high": "High",
+    "very high": "High",
+    "aggressive": "High",
+}
+
+# 1. Risk -> category mapping
+RISK_CATEGORIES = {
+    "Low": DEBT + HYBRID + ['Gold-Funds', 'Silver-Funds'],
+    "Moderate-Low": HYBRID + ['EQ-LC', 'EQ-L&MC', 'EQ-MLC'],
+    "Moderate": ['EQ-LC', 'EQ-L&MC', 'EQ-MLC'] + HYBRID,
+    "High": ['EQ-FLX', 'EQ-MC', 'EQ-SC', 'EQ-THEMATIC'] + SECTORAL,
+}
+
+# 2. Horizon -> categories added on top of the risk mapping
+HORIZON_CATEGORIES = {
+    "short": ['DT-LIQ', 'DT-SD', 'DT-MM'],
+    "medium": HYBRID + ['EQ-LC'],
+    # "EQ-* funds with higher growth potential"
+    "long": GROWTH_EQUITY,
+}
+
+# 3 + 4. Performance and risk limits
+RISK_LIMITS = {
+    "Low":          {"expense_ratio": 1.0, "standard_deviation": 12, "sharpe_ratio": 0.7, "beta": 0.5, "alpha": 0.5},
+    "Moderate-Low": {"expense_ratio": 1.2, "standard_deviation": 15, "sharpe_ratio": 0.8, "beta": 0.8, "alpha": 0.8},
+    "Moderate":     {"expense_ratio": 1.5, "standard_deviation": 20, "sharpe_ratio": 1.0, "beta": 1.0, "alpha": 1.0},
+    "High":         {"expense_ratio": 2.0, "standard_deviation": 25, "sharpe_ratio": 1.2, "beta": 1.5, "alpha": 1.5},
+}
+
+# which side of the limit each field is bounded on
+LIMIT_OPERATORS = {
+    "expense_ratio": "$lte",
+    "standard_deviation": "$lte",
+    "sharpe_ratio": "$gte",
+    "beta": "$lte",
+    "alpha": "$gte",
+}
+
+# "use only relevant fields": beta and alpha are equity-market measures that
+# debt, gold and silver funds mostly leave blank (""), so their limits bind
+# only funds in these categories; other fields apply to every category
+LIMIT_CATEGORIES = {
+    "beta": EQUITY + HYBRID,
+    "alpha": EQUITY + HYBRID,
+}
+
+# 5. Minimum returns (%) by horizon and risk
+MF_RETURN_THRESHOLDS = {
+    "short": {
+        "Low":          {"6_month_return": 3,   "1_year_return": 5},
+        "Moderate-Low": {"6_month_return": 3.5, "1_year_return": 5.5},
+        "Moderate":     {"6_month_return": 4,   "1_year_return": 6},
+        "High":         {"6_month_return": 5,   "1_year_return": 7},
+    },
+    "medium": {
+        "Low":          {"3_year_return": 6,  "5_year_return": 7},
+        "Moderate-Low": {"3_year_return": 7,  "5_year_return": 8},
+        "Moderate":     {"3_year_return": 8,  "5_year_return": 9},
+        "High":         {"3_year_return": 10, "5_year_return": 12},
+    },
+    "long": {
+        "Low":          {"5_year_return": 8,  "10_year_return": 9},
+        "Moderate-Low": {"5_year_return": 9,  "10_year_return": 10},
+        "Moderate":     {"5_year_return": 10, "10_year_return": 12},
+        "High":         {"5_year_return": 12, "10_year_return": 15},
+    },
+}
+
+ETF_RETURN_THRESHOLDS = {
+    "short":  {"6_month_return": 3, "1_year_return": 5},
+    "medium": {"1_year_return": 7, "3_year_return": 8},
+    "long":   {"1_year_return": 8, "3_year_return": 10, "5_year_return": 12},
+}
+
+def check_tables():
+    """Every horizon bucket adds known categories (none may silently add nothing); limits name known categories."""
+    for bucket in MF_RETURN_THRESHOLDS:
+        added = HORIZON_CATEGORIES.get(bucket)
+        if not added or set(added) - set(MF_CATEGORIES):
+            raise ValueError(f"HORIZON_CATEGORIES[{bucket!r}] must list known categories, got {added!r}")
+    for field, categories in LIMIT_CATEGORIES.items():
+        if field not in LIMIT_OPERATORS or set(categories) - set(MF_CATEGORIES):
+            raise ValueError(f"LIMIT_CATEGORIES[{field!r}] names an unknown field or category")
+
+check_tables()
+
+def normalize_risk(risk) -> str:
+    """Map free-form risk appetite onto one of RISK_LEVELS."""
+    key = re.sub(r"\s+", " ", str(risk or "").strip().lower())
+    if key not in RISK_ALIASES:
+        raise ValueError(f"Unknown risk appetite: {risk!r}")
+    return RISK_ALIASES[key]
+
+def parse_horizon_years(horizon) -> float:
+    """Extract the number of years from values like 5, "5", "5 years" or "7 years years"."""
+    if isinstance(horizon, (int, float)):
+        return float(horizon)
+    match = re.search(r"\d+(?:\.\d+)?", str(horizon or ""))
+    if not match:
+        raise ValueError(f"Could not parse investment horizon: {horizon!r}")
+    return float(match.group(0))
+
+def horizon_bucket(years: float) -> str:
+    if years < 3:
+        return "short"
+    if years < 7:
+        return "medium"
+    return "long"
+
+def _amount(amount):
+    try:
+        return float(amount)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid investment amount: {amount!r}")
+
+def build_mutual_fund_filter(risk, horizon, amount) -> dict:
+    """Build the mutual fund Mongo filter for a risk appetite, horizon and investment amount."""
+    level = normalize_risk(risk)
+    bucket = horizon_bucket(parse_horizon_years(horizon))
+
+    categories = list(dict.fromkeys(RISK_CATEGORIES[level] + HORIZON_CATEGORIES[bucket]))
+    query = {"category": {"$in": categories}}
+    for field, threshold in MF_RETURN_THRESHOLDS[bucket][level].items():
+        query[field] = {"$gte": threshold}
+    scoped = []
+    for field, limit in RISK_LIMITS[level].items():
+        condition = {LIMIT_OPERATORS[field]: limit}
+        if field not in LIMIT_CATEGORIES:
+            query[field] = condition
+            continue
+        exempt = [c for c in categories if c not in LIMIT_CATEGORIES[field]]
+        if len(exempt) == len(categories):
+            continue
+        # funds in exempt categories pass whatever they store for the field
+        scoped.append({"$or": [{"category": {"$in": exempt}}, {field: condition}]} if exempt else {field: condition})
+    if scoped:
+        query["$and"] = scoped
+    query["minimum_investment"] = {"$lte": _amount(amount)}
+    return query
+
+def build_etf_filter(horizon, amount) -> dict:
+    """Build the ETF Mongo filter for an investment horizon and amount."""
+    bucket = horizon_bucket(parse_horizon_years(horizon))
+
+    query = {field: {"$gte": threshold} for field, threshold in ETF_RETURN_THRESHOLDS[bucket].items()}
+    query["minimum_investment"] = {"$lte": _amount(amount)}
+    return query
+
+def extract_query_block(response: str):
+    """Pull the `query = {...}` block out of a pre-agent response, or None if absent."""
+    match = re.search(r"query = (\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})", response, re.DOTALL)
+    return match.group(1) if match else None
@@ -0,0 +1,16 @@
+from dotenv import load_dotenv
+import redis
+import os
+
+load_dotenv()
+
+# One connection pool per process, shared by every Redis user (task state,
+# strategy cache). redis-py clients are thread-safe, so executor threads and
+# request threads can all use redis_client directly.
+
+# Use environment variable for Redis URL in production, fallback to localhost for dev
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+
+pool = redis.BlockingConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, timeout=10)
+redis_client = redis.Redis(connection_pool=pool)
@@ -0,0 +1,193 @@
+from agent_entry import run_orc_agent, ORC_MODE, TRANSIENT_ERRORS
+from db import report_collection
+import job_queue
+import orc_cache
+import task_events
+import task_store
+import json
+import re
+
+# The "orc_report" job: runs the orchestrator for a /startTask request,
+# extracts the report once, saves it and publishes the task result. Runs in
+# worker.py processes, never in the web workers.
+
+ORC_REPORT_JOB = "orc_report"
+
+def _cache_inputs(user_inputs: dict) -> dict:
+    return {"user_inputs": user_inputs, "mode": ORC_MODE}
+
+def _complete_orc_report(task_id: str, result: str, report_type=None):
+    report = extract_investment_data(result, task_id, report_type)
+    report.pop("_id", None)  # added by insert_one
+    task_events.task_completed(task_id, report)
+
+def run_orc_report(payload: dict):
+    task_id = payload["task_id"]
+    # identical profiles against the same catalog share one orchestrator run
+    result = orc_cache.memoize(
+        _cache_inputs(payload["user_inputs"]),
+        # a retry reuses the outputs of the tools that finished on earlier attempts
+        lambda: run_orc_agent(
+            payload["user_inputs"],
+            on_event=task_events.progress_hook(task_id),
+            finished=task_store.get_tool_outputs(task_id),
+        ),
+    )
+    _complete_orc_report(task_id, result, payload.get("report_type"))
+
+def fail_orc_report(payload: dict, error: Exception):
+    task_events.task_failed(payload["task_id"], str(error))
+
+def fail_lost_orc_report(job_id: str, error: Exception):
+    # report jobs are enqueued with job_id=task_id; other ids have no task
+    if task_store.get_task(job_id) is not None:
+        task_events.task_failed(job_id, str(error))
+
+job_queue.register(
+    ORC_REPORT_JOB, run_orc_report,
+    on_failure=fail_orc_report, retry_on=TRANSIENT_ERRORS, on_lost=fail_lost_orc_report,
+)
+
+def enqueue_orc_report(task_id: str, user_inputs: dict, report_type=None) -> str | None:
+    """Queue the report job, or complete the task straight away from the orchestrator cache."""
+    task_events.task_queued(task_id)
+    try:
+        cached = orc_cache.lookup(_cache_inputs(user_inputs))
+    except Exception as e:
+        print(f"⚠️ Orchestrator cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        _complete_orc_report(task_id, cached, report_type)
+        return None
+    return job_queue.enqueue(ORC_REPORT_JOB, {"task_id": task_id, "user_inputs": user_inputs, "report_type": report_type}, job_id=task_id)
+
+def extract_investment_data(agent_text: str, name: str, type: int) -> dict:
+    result = {
+        "type": type,
+        "name": name,
+        "monthly_allocations": {},
+        "lumpsum_allocations": {},
+        "monthly_mutual_funds": [],
+        "lumpsum_mutual_funds": [],
+        "monthly_etfs": [],
+        "lumpsum_etfs": [],
+        "monthly_bonds": [],
+        "lumpsum_bonds": [],
+        "monthly_sgbs": [],
+        "lumpsum_sgbs": []
+    }
+
+    # 1) Clean markdown-style code block wrapper (```json ... ```)
+    agent_text = agent_text.strip()
+
+    if not agent_text:
+        print(f"⚠️ agent_text is empty for type {type}")
+        return result
+
+    if agent_text.startswith("```"):
+        agent_text = re.sub(r"^```(?:json)?\s*", "", agent_text, flags=re.IGNORECASE)
+        agent_text = re.sub(r"```$", "", agent_text.strip())
+
+    # 2) Parse JSON
+    try:
+        payload = json.loads(agent_text)
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON decode error for type {type}: {e}")
+        print(f"🚨 Raw agent_text (first 300 chars):\n{repr(agent_text[:300])}")
+        return result
+
+    # 3) Extract data
+    rec = payload.get("Investment Portfolio Recommendation", {})
+
+    # Monthly Investment
+    monthly = rec.get("Monthly Investment", {})
+    result["monthly_allocations"] = monthly.get("Allocation", {})
+
+    for mf in monthly.get("Mutual Funds Details", []):
+        result["monthly_mutual_funds"].append({
+            "name": mf.get("Fund Name"),
+            "category": mf.get("Category"),
+            "return_5y": mf.get("5-Year Return"),
+            "expense_ratio": mf.get("Expense Ratio"),
+            "key_metrics": mf.get("Key Metrics")
+        })
+
+    for etf in monthly.get("ETFs Details", []):
+        result["monthly_etfs"].append({
+            "name": etf.get("ETF Name"),
+            "return_3y": etf.get("3-Year Return"),
+            "expense_ratio": etf.get("Expense Ratio"),
+            "standard_deviation": etf.get("Standard Deviation"),
+            "key_metrics": etf.get("Key Metrics")
+        })
+
+    for bond in monthly.get("Bonds Details", []):
+        result["monthly_bonds"].append({
+            "name": bond.get("Bond Name"),
+            "ytm": bond.get("YTM"),
+            "coupon_rate": bond.get("Coupon Rate"),
+            "maturity_date": bond.get("Maturity Date"),
+            "last_traded_price": bond.get("Last Traded Price"),
+            "key_metrics": bond.get("Key Metrics")
+        })
+
+    for sgb in monthly.get("SGBs Details", []):
+        result["monthly_sgbs"].append({
+            "name": sgb.get("Bond Name"),
+            "last_traded_price": sgb.get("Last Traded Price (LTP)"),
+            "interest_rate": sgb.get("Interest Rate"),
+            "maturity_date": sgb.get("Maturity Date"),
+            "expected_returns": sgb.get("Expected Returns")
+        })
+
+    # Lumpsum Investment
+    lumpsum = rec.get("Lumpsum Investment", {})
+    result["lumpsum_allocations"] = lumpsum.get("Allocation", {})
+
+    for mf in lumpsum.get("Mutual Funds Details", []):
+        result["lumpsum_mutual_funds"].append({
+            "name": mf.get("Fund Name"),
+            "category": mf.get("Category"),
+            "return_5y": mf.get("5-Year Return"),
+            "expense_ratio": mf.get("Expense Ratio"),
+            "key_metrics": mf.get("Key Metrics")
+        })
+
+    for etf in lumpsum.get("ETFs Details", []):
+        result["lumpsum_etfs"].append({
+            "name": etf.get("ETF Name"),
+            "return_3y": etf.get("3-Year Return"),
+            "expense_ratio": etf.get("Expense Ratio"),
+            "standard_deviation": etf.get("Standard Deviation"),
+            "key_metrics": etf.get("Key Metrics")
+        })
+
+    for bond in lumpsum.get("Bonds Details", []):
+        result["lumpsum_bonds"].append({
+            "name": bond.get("Bond Name"),
+            "ytm": bond.get("YTM"),
+            "coupon_rate": bond.get("Coupon Rate"),
+            "maturity_date": bond.get("Maturity Date"),
+            "last_traded_price": bond.get("Last Traded Price"),
+            "key_metrics": bond.get("Key Metrics")
+        })
+
+    for sgb in lumpsum.get("SGBs Details", []):
+        result["lumpsum_sgbs"].append({
+            "name": sgb.get("Bond Name"),
+            "last_traded_price": sgb.get("Last Traded Price (LTP)"),
+            "interest_rate": sgb.get("Interest Rate"),
+            "maturity_date": sgb.get("Maturity Date"),
+            "expected_returns": sgb.get("Expected Returns")
+        })
+
+    # 4) Save to MongoDB (if MongoDB collection is defined)
+    print("📊 Extracted investment data:", result)
+    try:
+        report_collection.find_one_and_delete({"type": type})
+        report_collection.insert_one(result)
+        print(f"✅ Investment data for type {type} saved to MongoDB")
+    except Exception as e:
+        print(f"❌ Error saving to MongoDB for type {type}: {e}")
+
+    return result
@@ -1,10 +1,6 @@
 from .toolkit import fetch_top_sgbs
-from langchain.agents import initialize_agent, Tool, AgentType
-from dotenv import load_dotenv
-import os
-from langchain_community.chat_models import ChatOpenAI
-
-load_dotenv()
+from langchain.agents import Tool
+from llm_pool import get_agent_executor
 
 # Define tools
 tools = [
@@ -22,11 +18,4 @@ tools = [
 
 # Lazy initialization of the agent
 def get_sgb_agent():
-    print("🔧 Initializing SGB Agent...")
-    return initialize_agent(
-        tools=tools,
-        llm=ChatOpenAI(model="gpt-4o-mini", temperature=0.2, openai_api_key=os.getenv("OPENAI_API_KEY")),
-        agent=AgentType.OPENAI_FUNCTIONS,
-        handle_parsing_errors=True,
-        verbose=True
-    )
\ No newline at end of file
+    return get_agent_executor("SGB", tools, "gpt-4o-mini", temperature=0.2)
\ No newline at end of file
@@ -3,6 +3,10 @@ from .agent import get_sgb_agent
 from .mixer_agent import invoke_mixer_agent
 import json
 import ast
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from concurrency import run_concurrently
 
 query_monthly_template = """
 You are a Sovereign Gold Bond (SGB) expert with deep knowledge of inflation protection, returns, and portfolio diversification.
@@ -109,13 +113,17 @@ def sgb_tool(user_inputs) -> str:
                 return "Error: Could not parse user inputs"
     agent = get_sgb_agent()
     query_monthly = query_monthly_template.format(**user_inputs)
-    response_monthly = agent.invoke({"input": query_monthly})
-    if(user_inputs["lumpsum_investment"] == 0):
-        query_lumpsum = "No Lumpsum Investment Found"
-        response_lumpsum = {"output": "No Lumpsum Investment Found"}
-    else:
+
+    def run_lumpsum():
+        if(user_inputs["lumpsum_investment"] == 0):
+            return {"output": "No Lumpsum Investment Found"}
         query_lumpsum = query_lumpsum_template.format(**user_inputs)
-        response_lumpsum = agent.invoke({"input": query_lumpsum})
+        return agent.invoke({"input": query_lumpsum})
+
+    response_monthly, response_lumpsum = run_concurrently(
+        lambda: agent.invoke({"input": query_monthly}),
+        run_lumpsum,
+    )
     
     mixer_query = mixer_query_template.format(
         lumpsum_response=response_lumpsum.get("output", "No response from Lumpsum agent."),
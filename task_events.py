@@ -0,0 +1,79 @@
+from flask_socketio import SocketIO
+from redis_pool import REDIS_URL
+import task_store
+import os
+
+# Task lifecycle events pushed to the per-task Socket.IO room "task:{task_id}":
+#
+#   task_queued     {"task_id"}
+#   tool_started    {"task_id", "tool"}
+#   tool_finished   {"task_id", "tool", "ok", ["error"]}
+#   task_completed  {"task_id", "result"}
+#   task_error      {"task_id", "error"}
+#
+# Events travel through the Socket.IO Redis message queue, so a task running
+# in any gunicorn worker (or a separate process) reaches clients connected to
+# any other worker. Each event also updates task_store, so clients that
+# subscribe late get the current state instead of missing events.
+
+# "" disables the message queue (single-process dev server)
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", REDIS_URL) or None
+
+_socketio = None
+
+def init_socketio(socketio: SocketIO):
+    """Emit through the app's SocketIO server instead of a standalone queue publisher."""
+    global _socketio
+    _socketio = socketio
+
+def _get_socketio() -> SocketIO:
+    # processes without a Flask app (e.g. background workers) publish to the queue only
+    global _socketio
+    if _socketio is None:
+        _socketio = SocketIO(message_queue=SOCKETIO_MESSAGE_QUEUE)
+    return _socketio
+
+def room(task_id: str) -> str:
+    return f"task:{task_id}"
+
+def emit_task_event(task_id: str, event: str, **data):
+    try:
+        _get_socketio().emit(event, {"task_id": task_id, **data}, to=room(task_id))
+    except Exception as e:
+        print(f"⚠️ Could not emit {event} for task {task_id}: {e}")
+
+def progress_hook(task_id: str):
+    """on_event callback for run_orc_agent: records tool progress and pushes it to the task room."""
+    def on_event(event, tool=None, ok=True, **data):
+        if event == "tool_started":
+            task_store.set_tool_status(task_id, tool, "started")
+            emit_task_event(task_id, event, tool=tool)
+        elif event == "tool_finished":
+            # the output is kept for a retry of the job, not pushed to clients
+            output = data.pop("output", None)
+            task_store.set_tool_status(task_id, tool, "finished" if ok else "failed", output if ok else None)
+            emit_task_event(task_id, event, tool=tool, ok=ok, **data)
+    return on_event
+
+def task_queued(task_id: str):
+    task_store.create_task(task_id)
+    emit_task_event(task_id, "task_queued")
+
+def task_completed(task_id: str, result):
+    task_store.complete_task(task_id, result)
+    emit_task_event(task_id, "task_completed", result=result)
+
+def task_failed(task_id: str, error: str):
+    task_store.fail_task(task_id, error)
+    emit_task_event(task_id, "task_error", error=error)
+
+def replay_state(task_id: str) -> dict | None:
+    """Current task state as the event a newly subscribed client would have missed."""
+    state = task_store.get_task(task_id)
+    if state is None:
+        return None
+    if state["status"] == task_store.COMPLETED:
+        return {"event": "task_completed", "task_id": task_id, "result": state["result"]}
+    if state["status"] == task_store.ERROR:
+        return {"event": "task_error", "task_id": task_id, "error": state["error"]}
+    return {"event": "task_queued", "task_id": task_id, "tools": state["tools"]}
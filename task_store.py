@@ -0,0 +1,84 @@
+from redis_pool import redis_client
+import orjson
+import time
+import os
+
+# Task state for /startTask -> /getResult. Each task is one Redis hash:
+#
+#   task:{task_id} -> v, status, error, result, created_at, updated_at,
+#                     tool:{tool_name} (started / finished / failed),
+#                     output:{tool_name} (a finished tool's output, reused on retry)
+#
+# Status changes touch only the fields that change, and the result is stored
+# once, already extracted, as orjson bytes. Pollers read status first and only
+# fetch the result field for completed tasks. Every worker process reads the
+# same hash, so any gunicorn worker can answer a poll.
+
+TASK_STATE_VERSION = 1
+TASK_TTL_SECONDS = int(os.getenv("TASK_TTL_SECONDS", "3600"))
+
+PROCESSING = "processing"
+COMPLETED = "completed"
+ERROR = "error"
+
+def _key(task_id: str) -> str:
+    return f"task:{task_id}"
+
+def _write(task_id: str, fields: dict):
+    fields["updated_at"] = time.time()
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(_key(task_id), mapping=fields)
+    pipe.expire(_key(task_id), TASK_TTL_SECONDS)
+    pipe.execute()
+
+def create_task(task_id: str):
+    now = time.time()
+    _write(task_id, {"v": TASK_STATE_VERSION, "status": PROCESSING, "created_at": now})
+
+def set_status(task_id: str, status: str):
+    _write(task_id, {"status": status})
+
+def set_tool_status(task_id: str, tool_name: str, status: str, output: str = None):
+    fields = {f"tool:{tool_name}": status}
+    if output is not None:
+        fields[f"output:{tool_name}"] = output
+    _write(task_id, fields)
+
+def get_tool_outputs(task_id: str) -> dict:
+    """{tool_name: output} for the tools that already finished on an earlier attempt."""
+    return {
+        field.decode().split(":", 1)[1]: value.decode()
+        for field, value in redis_client.hscan_iter(_key(task_id), match="output:*")
+    }
+
+def complete_task(task_id: str, result):
+    """Store the final (already extracted) result and mark the task completed."""
+    _write(task_id, {"status": COMPLETED, "result": orjson.dumps(result, default=str)})
+
+def fail_task(task_id: str, error: str):
+    _write(task_id, {"status": ERROR, "error": error})
+
+def get_status(task_id: str) -> str | None:
+    status = redis_client.hget(_key(task_id), "status")
+    return status.decode() if status else None
+
+def get_task(task_id: str) -> dict | None:
+    """
+    Task state as {"status", "result", "error", "tools"}; None for unknown or
+    expired tasks. The result blob is only fetched once the task has completed.
+    """
+    version, status, error = redis_client.hmget(_key(task_id), "v", "status", "error")
+    if status is None:
+        return None
+    if version is None or int(version) != TASK_STATE_VERSION:
+        raise ValueError(f"Unsupported task state version {version!r} for task {task_id}")
+    status = status.decode()
+    result = None
+    if status == COMPLETED:
+        blob = redis_client.hget(_key(task_id), "result")
+        result = orjson.loads(blob) if blob else None
+    tools = {
+        field.decode().split(":", 1)[1]: value.decode()
+        for field, value in redis_client.hscan_iter(_key(task_id), match="tool:*")
+    }
+    return {"status": status, "result": result, "error": error.decode() if error else None, "tools": tools}
@@ -0,0 +1,74 @@
+from .main import mf_query_template, fund_metrics_hash, reason_input, REASON_FIELDS
+from .reasoner import initialize_reasoner_agent
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from db import mutual_funds_collection
+
+# Precompute the "why" explanation for every mutual fund:
+#   python -m why.batch [--force]
+# Only funds whose metrics hash differs from the stored advisor_reason_hash
+# (or that have no explanation yet) are sent to the LLM, at most
+# WHY_BATCH_CONCURRENCY at a time. Results are written back in bulk with the
+# hash they were generated from.
+
+WHY_BATCH_CONCURRENCY = int(os.getenv("WHY_BATCH_CONCURRENCY", "8"))
+WHY_BATCH_WRITE_SIZE = int(os.getenv("WHY_BATCH_WRITE_SIZE", "50"))
+
+# all the staleness check reads: the hashed fund details and what is stored
+PROJECTION = {field: 1 for field in REASON_FIELDS + ("advisor_reason", "advisor_reason_hash")}
+
+def stale_funds(collection=mutual_funds_collection, force: bool = False) -> list:
+    """(_id, metrics hash, fund details) for every fund whose explanation is missing or out of date."""
+    stale = []
+    for fund in collection.find({}, PROJECTION):
+        metrics_hash = fund_metrics_hash(fund)
+        if force or not fund.get("advisor_reason") or fund.get("advisor_reason_hash") != metrics_hash:
+            stale.append((fund["_id"], metrics_hash, reason_input(fund)))
+    return stale
+
+async def _explain(llm, semaphore, fund: dict) -> str:
+    async with semaphore:
+        response = await llm.ainvoke(mf_query_template.format(mutual_fund=fund))
+        return response.content
+
+async def generate_reasons(collection=mutual_funds_collection, force: bool = False) -> dict:
+    """Regenerate stale explanations; returns {"stale", "updated", "failed"} counts."""
+    stale = stale_funds(collection, force)
+    print(f"🧠 {len(stale)} funds need a new explanation")
+    llm = initialize_reasoner_agent()
+    semaphore = asyncio.Semaphore(WHY_BATCH_CONCURRENCY)
+
+    async def run(_id, metrics_hash, fund):
+        try:
+            return _id, metrics_hash, await _explain(llm, semaphore, fund)
+        except Exception as e:
+            print(f"❌ Explanation failed for {fund.get('fund_name')}: {e}")
+            return _id, metrics_hash, None
+
+    updated = failed = 0
+    ops = []
+    for task in asyncio.as_completed([run(*item) for item in stale]):
+        _id, metrics_hash, reason = await task
+        if reason is None:
+            failed += 1
+            continue
+        ops.append(UpdateOne({"_id": _id}, {"$set": {
+            "advisor_reason": reason,
+            "advisor_reason_hash": metrics_hash,
+            "advisor_reason_at": datetime.now(timezone.utc),
+        }}))
+        if len(ops) >= WHY_BATCH_WRITE_SIZE:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+
+    print(f"✅ Explanations updated: {updated}, failed: {failed}")
+    return {"stale": len(stale), "updated": updated, "failed": failed}
+
+if __name__ == "__main__":
+    asyncio.run(generate_reasons(force="--force" in sys.argv))
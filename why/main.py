@@ -1,4 +1,7 @@
 from .reasoner import invoke_reasoner_agent
+from datetime import datetime, timezone
+import hashlib
+import json
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -14,6 +17,44 @@ Give 3-4 points(->) explanantion on why this mutual fund might be chosen by the
 You must have the first two points for returns and risk inference, they are most important things to be explained.
 """
 
+# the fund details an explanation is built from, and so the only fields whose
+# change makes a stored explanation stale (batch stamps such as peer_ranks or
+# scores_updated are deliberately left out)
+REASON_FIELDS = (
+    "fund_name", "category", "riskometer", "launch_date", "net_assets",
+    "1_week_return", "1_month_return", "3_month_return", "6_month_return",
+    "1_year_return", "3_year_return", "5_year_return", "10_year_return",
+    "standard_deviation", "sharpe_ratio", "sortino_ratio", "beta", "alpha",
+    "information_ratio", "r_squared",
+    "expense_ratio", "minimum_investment", "exit_load", "fund_manager",
+)
+
+def reason_input(fund: dict) -> dict:
+    """The fund details an explanation is generated from."""
+    return {k: fund[k] for k in REASON_FIELDS if k in fund}
+
+def fund_metrics_hash(fund: dict) -> str:
+    return hashlib.sha256(json.dumps(reason_input(fund), sort_keys=True, default=str).encode()).hexdigest()
+
+def get_fund_reason(fund_name: str):
+    """
+    Stored explanation for a fund, generating and storing it only when it is
+    missing or the fund's metrics changed since it was written. None if the
+    fund does not exist.
+    """
+    fund = mutual_funds_collection.find_one({"fund_name": fund_name})
+    if not fund:
+        return None
+    metrics_hash = fund_metrics_hash(fund)
+    if fund.get("advisor_reason") and fund.get("advisor_reason_hash") == metrics_hash:
+        return fund["advisor_reason"]
+    reason = mutual_fund_reasoner_tool({"mutual_fund": reason_input(fund)})
+    mutual_funds_collection.update_one(
+        {"_id": fund["_id"]},
+        {"$set": {"advisor_reason": reason, "advisor_reason_hash": metrics_hash, "advisor_reason_at": datetime.now(timezone.utc)}}
+    )
+    return reason
+
 def mutual_fund_reasoner_tool(mutual_fund_details):
     query = mf_query_template.format(**mutual_fund_details)
     response = invoke_reasoner_agent(query)
@@ -22,14 +63,8 @@ def mutual_fund_reasoner_tool(mutual_fund_details):
 
 if __name__ == "__main__":
     fund_name = "Edelweiss Equity Savings Fund - Direct Plan"
-    fund = mutual_funds_collection.find_one({"fund_name": fund_name})
-    if not fund:
+    reason = get_fund_reason(fund_name)
+    if reason is None:
         print(f"Mutual fund '{fund_name}' not found.")
     else:
-        fund["_id"] = str(fund["_id"])
-        reason = mutual_fund_reasoner_tool({"mutual_fund": fund})
-        mutual_funds_collection.update_one(
-            {"fund_name": fund_name},
-            {"$set": {"advisor_reason": reason}}
-        )
         print("Reason saved to DB.")
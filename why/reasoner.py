@@ -1,17 +1,13 @@
-from dotenv import load_dotenv
 import os
-from langchain_community.chat_models import ChatOpenAI
-
-load_dotenv()
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from llm_pool import get_llm
+from prompt_cache import cached_predict
 
 def initialize_reasoner_agent():
-    return ChatOpenAI(
-        model="gpt-5-mini",
-        temperature=1.0,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
+    return get_llm("gpt-5-mini", temperature=1.0)
 
 def invoke_reasoner_agent(input_query):
     reasoner_agent = initialize_reasoner_agent()
-    response = reasoner_agent.predict(input_query)
+    response = cached_predict("why.reasoner", reasoner_agent, input_query)
     return response
\ No newline at end of file
@@ -0,0 +1,19 @@
+from threading import Event
+import job_queue
+import report_jobs  # registers the orc_report job
+import signal
+import os
+
+# Background worker for the Redis job queue: `python worker.py`.
+# Run as many processes as needed; each runs WORKER_CONCURRENCY jobs at once.
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+
+if __name__ == "__main__":
+    stop = Event()
+    # finish in-flight jobs on shutdown; unfinished claims are requeued after their visibility timeout
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    print(f"👷 Worker started with concurrency {WORKER_CONCURRENCY}: {job_queue.stats()}")
+    job_queue.work(WORKER_CONCURRENCY, WORKER_POLL_SECONDS, stop)